@@ -0,0 +1,168 @@
+# asset_bundle.py
+#
+# all images and sound effects under assets/, decoded once at build time into one file:
+#
+#     python asset_bundle.py
+#
+# at runtime load_image / load_sound serve assets straight from the memory-mapped bundle
+# (no PNG or WAV decoding), and fall back to the source files when there is no bundle
+# or an asset is not in it (sounds through the converted sound cache, see sound_cache.py).
+# the index keeps each source file's mtime and size: an asset whose file changed since the
+# bundle was built is loaded from the file until the bundle is rebuilt.
+import json
+import mmap
+import os
+import struct
+import wave
+import pygame
+from sound_cache import load_converted_sound
+
+BUNDLE_PATH = "assets/assets.bundle"
+BUNDLE_MAGIC = b"ETBNDL02"
+ASSETS_DIR = "assets"
+SKIPPED_DIRS = ("preview",)  # README screenshots, never loaded by the game
+ALIGNMENT = 16  # every buffer starts on a 16 byte boundary
+
+# header: magic, then the length of the json index that follows it
+_HEADER = struct.Struct("<8sI")
+
+# bundled sound sample formats, as reported by pygame.mixer.get_init()
+_SAMPLE_FORMATS = {
+    1: 8,    # unsigned 8 bit
+    2: -16,  # signed 16 bit
+}
+
+# opened bundle: (mmap, memoryview, index), False when there is none
+_bundle = None
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _decode_asset(path):
+    # returns (index entry, raw bytes) for an asset file, or None if it is not bundled
+    if path.endswith(".png"):
+        image = pygame.image.load(path)
+        return {"kind": "image", "size": image.get_size(), "format": "RGBA"}, pygame.image.tobytes(image, "RGBA")
+    if path.endswith(".wav") and "/sounds/" in path:
+        with wave.open(path, "rb") as wav:
+            sample_format = _SAMPLE_FORMATS.get(wav.getsampwidth())
+            if sample_format is None:
+                return None
+            entry = {"kind": "sound", "frequency": wav.getframerate(),
+                     "format": sample_format, "channels": wav.getnchannels()}
+            return entry, wav.readframes(wav.getnframes())
+    # music is not bundled, it is decoded through the sound cache
+    return None
+
+
+def build_bundle(assets_dir=ASSETS_DIR, bundle_path=BUNDLE_PATH):
+    """decodes every image and sound effect under assets_dir into one bundle file"""
+    assets = []
+    for root, dirs, files in os.walk(assets_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+        for name in sorted(files):
+            # asset paths are the ones the game loads them with
+            path = os.path.join(root, name).replace(os.sep, "/")
+            decoded = _decode_asset(path)
+            if decoded is not None:
+                stat = os.stat(path)
+                entry = dict(decoded[0], source_mtime=stat.st_mtime_ns, source_size=stat.st_size)
+                assets.append((path, entry, decoded[1]))
+
+    # the index holds offsets into the file, which depend on the index length:
+    # size it with placeholder offsets first (offsets are fixed-width below)
+    index = {path: dict(entry, offset=0, length=len(data)) for path, entry, data in assets}
+    index_length = len(json.dumps(index).encode()) + 16 * len(assets)
+    offset = _align(_HEADER.size + index_length)
+    for path, entry, data in assets:
+        index[path]["offset"] = offset
+        offset = _align(offset + len(data))
+
+    index_bytes = json.dumps(index).encode().ljust(index_length)
+    # written next to the bundle then moved over it, so an interrupted build never leaves a cut bundle
+    temp_path = bundle_path + ".tmp"
+    with open(temp_path, "wb") as bundle:
+        bundle.write(_HEADER.pack(BUNDLE_MAGIC, index_length))
+        bundle.write(index_bytes)
+        for path, entry, data in assets:
+            bundle.seek(index[path]["offset"])
+            bundle.write(data)
+    os.replace(temp_path, bundle_path)
+    return len(assets)
+
+
+def _read_index(data):
+    # returns the index of mapped bundle bytes, or None if they are not a whole bundle
+    # (another format, or a cut header, index or buffers)
+    try:
+        magic, index_length = _HEADER.unpack_from(data)
+        if magic != BUNDLE_MAGIC:
+            return None
+        index = json.loads(data[_HEADER.size:_HEADER.size + index_length])
+        if any(entry["offset"] + entry["length"] > len(data) for entry in index.values()):
+            return None
+    except (struct.error, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return index
+
+
+def _open_bundle():
+    # maps the bundle on first use
+    global _bundle
+    if _bundle is None:
+        _bundle = False
+        try:
+            with open(BUNDLE_PATH, "rb") as bundle_file:
+                # private mapping: the bytes are never written back to the bundle
+                data = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return _bundle
+        index = _read_index(data)
+        if index is None:
+            # no usable bundle: assets are loaded from their files
+            data.close()
+            return _bundle
+        _bundle = (data, memoryview(data), index)
+    return _bundle
+
+
+def _is_stale(entry, path):
+    # the source file changed since the bundle was built (without a source file, the bundled copy stands)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_mtime_ns != entry["source_mtime"] or stat.st_size != entry["source_size"]
+
+
+def _get_entry(path, kind):
+    bundle = _open_bundle()
+    if not bundle:
+        return None, None
+    entry = bundle[2].get(path)
+    if entry is None or entry["kind"] != kind or _is_stale(entry, path):
+        return None, None
+    return entry, bundle[1][entry["offset"]:entry["offset"] + entry["length"]]
+
+
+def load_image(path):
+    """returns the image at path, backed by the bundle when it is bundled"""
+    entry, buffer = _get_entry(path, "image")
+    if entry is None:
+        return pygame.image.load(path)
+    return pygame.image.frombuffer(buffer, entry["size"], entry["format"])
+
+
+def load_sound(path):
+    """returns the sound at path in the mixer format, from bundled PCM when it already matches"""
+    entry, buffer = _get_entry(path, "sound")
+    if entry is None or pygame.mixer.get_init() != (entry["frequency"], entry["format"], entry["channels"]):
+        return load_converted_sound(path)
+    return pygame.mixer.Sound(buffer=buffer)
+
+
+if __name__ == "__main__":
+    count = build_bundle()
+    print(f"{count} assets bundled in {BUNDLE_PATH}")
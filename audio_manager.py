@@ -1,34 +1,116 @@
 # audio_manager.py
 import pygame
+from asset_bundle import load_sound
+
+# sound effect files
+SOUND_FILES = {
+    # E.T. sounds
+    "et_walk": "assets/sounds/E.T/walk.wav",
+    "et_run": "assets/sounds/E.T/run.wav",
+    "et_head_raise": "assets/sounds/E.T/head_raise.wav",
+    "et_fall": "assets/sounds/E.T/fall.wav",
+    "et_head_raise_levitating": "assets/sounds/E.T/head_raise_levitating.wav",
+    
+    # spaceship sounds
+    "spaceship": "assets/sounds/spaceship/spaceship.wav"
+}
+
+# mixer sample rate, the one the sound effects were recorded at (no resampling on load)
+MIXER_FREQUENCY = 48000
+# mixer buffer in samples (5 ms at 48 kHz), small for a low latency; raise it if sound crackles
+MIXER_BUFFER = 256
+NUM_CHANNELS = 8  # mixer channels, the reserved loop channels included
+
+# music files, decoded once and kept in memory
+MUSIC_FILES = {
+    "title": "assets/music/title_music.wav"
+}
+
+# looping sounds, each on a reserved channel of its own, in channel order
+LOOP_SOUNDS = ("et_walk", "et_run")
+LOOP_FADE_FRAMES = 6  # frames to fade a loop in or out when switching between loops
+MUSIC_CHANNEL = len(LOOP_SOUNDS)  # reserved channel of the music, after the loop channels
+
+class NullSound:
+    """silent stand-in for pygame.mixer.Sound, used when running without a mixer.
+
+    it never touches SDL audio, and counts the calls made to it.
+    """
 
-class AudioManager:
     def __init__(self):
-        pygame.mixer.init()
-        
-        # load all sounds once
-        self.sounds = {
-            # E.T. sounds
-            "et_walk": pygame.mixer.Sound("assets/sounds/E.T/walk.wav"),
-            "et_run": pygame.mixer.Sound("assets/sounds/E.T/run.wav"),
-            "et_head_raise": pygame.mixer.Sound("assets/sounds/E.T/head_raise.wav"),
-            "et_fall": pygame.mixer.Sound("assets/sounds/E.T/fall.wav"),
-            "et_head_raise_levitating": pygame.mixer.Sound("assets/sounds/E.T/head_raise_levitating.wav"),
-            
-            # spaceship sounds
-            "spaceship": pygame.mixer.Sound("assets/sounds/spaceship/spaceship.wav")
-        }
+        self.play_calls = 0
+        self.stop_calls = 0
+        self.volume = 1.0
+
+    def play(self, loops=0):
+        self.play_calls += 1
+        return None
+
+    def stop(self):
+        self.stop_calls += 1
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+
+class NullChannel:
+    """silent stand-in for pygame.mixer.Channel, counts the calls made to it"""
+
+    def __init__(self):
+        self.play_calls = 0
+        self.stop_calls = 0
+        self.volume = 1.0
+        self.sound = None  # playing sound
+
+    def play(self, sound, loops=0):
+        self.play_calls += 1
+        self.sound = sound
+
+    def stop(self):
+        self.stop_calls += 1
+        self.sound = None
+
+    def get_busy(self):
+        return self.sound is not None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+
+class AudioManager:
+    def __init__(self, headless=False, buffer=MIXER_BUFFER):
+        # headless: no mixer, every sound and channel is a null one
+        self.headless = headless
         
-        # set volumes
-        self.sounds["et_head_raise"].set_volume(0.75)
+        # current volume of each loop, in fade steps (0: stopped, LOOP_FADE_FRAMES: full)
+        self.loop_levels = {name: 0 for name in LOOP_SOUNDS}
+        self.settled_loops = ()  # loops wanted, once every loop has reached its volume
         
         # music tracking
         self.current_music = None
         self.music_playing = False
         
-        # music files
-        self.music_files = {
-            "title": "assets/music/title_music.wav"
-        }
+        if headless:
+            self.sounds = {name: NullSound() for name in SOUND_FILES}
+            self.music = {name: NullSound() for name in MUSIC_FILES}
+            self.loop_channels = {name: NullChannel() for name in LOOP_SOUNDS}
+            self.music_channel = NullChannel()
+        else:
+            # (does nothing if pygame.init already started the mixer from pre_init settings)
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, buffer=buffer)
+            
+            # the first channels are kept for the loops and the music, one shot sounds never take them
+            pygame.mixer.set_num_channels(NUM_CHANNELS)
+            pygame.mixer.set_reserved(len(LOOP_SOUNDS) + 1)
+            self.loop_channels = {name: pygame.mixer.Channel(index) for index, name in enumerate(LOOP_SOUNDS)}
+            self.music_channel = pygame.mixer.Channel(MUSIC_CHANNEL)
+            
+            # load all sounds once, in the mixer format
+            self.sounds = {name: load_sound(path) for name, path in SOUND_FILES.items()}
+            self.music = {name: load_sound(path) for name, path in MUSIC_FILES.items()}
+        
+        # set volumes
+        self.sounds["et_head_raise"].set_volume(0.75)
     
     def play_sound(self, sound_name, loops=0):
         """plays a specific sound"""
@@ -41,17 +123,49 @@ class AudioManager:
         if sound_name in self.sounds:
             self.sounds[sound_name].stop()
     
+    def update_loops(self, playing=()):
+        """sets the loops that should be heard this frame, call it every frame.
+
+        only what differs from the last call changes: when one loop takes over from
+        another (walk/run), they crossfade over LOOP_FADE_FRAMES frames, otherwise loops
+        start and stop at once. a loop is never restarted while it is heard.
+        """
+        if playing == self.settled_loops:
+            return
+        loop_levels = self.loop_levels
+        switching = any(name in playing and level < LOOP_FADE_FRAMES for name, level in loop_levels.items()) and \
+            any(name not in playing and level for name, level in loop_levels.items())
+        for name, level in loop_levels.items():
+            target = LOOP_FADE_FRAMES if name in playing else 0
+            if level == target:
+                continue
+            if switching:
+                level += 1 if target > level else -1
+            else:
+                level = target
+            loop_levels[name] = level
+
+            channel = self.loop_channels[name]
+            if level == 0:
+                channel.stop()
+            else:
+                if not channel.get_busy():
+                    channel.play(self.sounds[name], loops=-1)
+                channel.set_volume(level / LOOP_FADE_FRAMES)
+        # nothing left to do until the loops wanted change
+        settled = all(level == (LOOP_FADE_FRAMES if name in playing else 0) for name, level in loop_levels.items())
+        self.settled_loops = playing if settled else None
+    
     def play_music(self, music_name, loops=-1):
         """play some music"""
-        if music_name in self.music_files and self.current_music != music_name:
-            pygame.mixer.music.load(self.music_files[music_name])
-            pygame.mixer.music.play(loops)
+        if music_name in self.music and self.current_music != music_name:
+            self.music_channel.play(self.music[music_name], loops)
             self.current_music = music_name
             self.music_playing = True
     
     def stop_music(self):
         """stop music"""
-        pygame.mixer.music.stop()
+        self.music_channel.stop()
         self.current_music = None
         self.music_playing = False
     
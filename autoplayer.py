@@ -0,0 +1,320 @@
+# autoplayer.py
+#
+# a bot that plays the headless game by itself, for load and soak testing:
+#
+#     python autoplayer.py --duration 3600               play for an hour, report every 10 s
+#     python autoplayer.py --render --output soak.jsonl  draw every frame too, keep the samples
+#     python autoplayer.py --goals pit,wander --seed 3   scripted goals instead of random ones
+#
+# each report line has the frames per second since the last report and the process's
+# resident memory (RSS), so memory growth and throughput degradation over hours show up.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import pygame
+from graphics import get_center_area, SCREEN_WIDTH, SCREEN_HEIGHT
+from controls import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN, INPUT_SPACE, INPUT_SPACE_PRESSED
+from player import (STATE_WALKING, STATE_FALLING, STATE_LEVITATING, STATE_PIT,
+                    STATE_ESCAPED_PIT_MOVING)
+from route_planner import RoutePlanner
+from simulation import Simulation
+from renderer import DirtyRectRenderer
+
+GOALS = ("wander", "pit", "drain")
+MAX_GOAL_FRAMES = 3000     # a goal not reached by then is given up
+REPORT_INTERVAL = 10.0     # seconds between reports
+DRAIN_POINTS = (200, 1000) # points spent by a drain goal (random in this range)
+ARROWS = (INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN,
+          INPUT_LEFT | INPUT_UP, INPUT_LEFT | INPUT_DOWN, INPUT_RIGHT | INPUT_UP, INPUT_RIGHT | INPUT_DOWN)
+
+
+def get_rss():
+    """returns the process's resident memory in bytes, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # no /proc (macOS): the peak, in bytes there
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class AutoPlayer:
+    """picks the input bits of every frame of a Simulation from a goal:
+
+    - "wander": run to another screen (a random one), the cheapest way
+    - "pit": walk into a pit (going to a screen with pits first), then levitate out
+    - "drain": pace around at random, running and raising the head, spending points
+
+    goals are taken in turn from `goals` if given, at random otherwise. whatever the goal,
+    e.t. levitates out when it is in a pit.
+    """
+
+    def __init__(self, simulation, goals=None, seed=None):
+        self.simulation = simulation
+        self.table = simulation.level_manager.table
+        self.planner = RoutePlanner.for_table(self.table)
+        self.random = random.Random(seed)
+        self.goals = goals
+        self.goal_count = 0
+        self.goal = None
+        self.goal_frames = 0
+        # goal details: target screen (wander, pit), pit rect (pit), points to reach and
+        # current arrows (drain)
+        self.target_level_id = None
+        self.pit_rect = None
+        self.fell = False
+        self.drain_until = 0
+        self.drain_arrows = 0
+        self.drain_frames = 0
+        # screens that have pits
+        self.pit_level_ids = [level_id for level_id, rects in enumerate(self.table.level_pit_rects) if rects]
+
+    def start_goal(self):
+        """moves on to the next goal"""
+        if self.goals:
+            self.goal = self.goals[self.goal_count % len(self.goals)]
+        else:
+            self.goal = self.random.choice(GOALS)
+        self.goal_count += 1
+        self.goal_frames = 0
+        self.target_level_id = None
+        self.pit_rect = None
+        self.fell = False
+        if self.goal == "drain":
+            self.drain_until = self.simulation.counter.value - self.random.randint(*DRAIN_POINTS)
+            self.drain_frames = 0
+
+    def get_input(self, events):
+        """returns the input bits of the next frame (events: what the last step returned)"""
+        simulation = self.simulation
+        et = simulation.et
+        if self.goal is None or self.goal_frames >= MAX_GOAL_FRAMES:
+            self.start_goal()
+        self.goal_frames += 1
+        if "PIT_FALL" in events:
+            self.fell = True
+
+        # in and around a pit, whatever the goal
+        state = et.state
+        if state == STATE_FALLING:
+            # sometimes raise the head during the fall, to levitate before the bottom
+            return INPUT_SPACE_PRESSED if self.random.random() < 0.01 else 0
+        if state == STATE_LEVITATING:
+            return INPUT_UP
+        if state == STATE_PIT:
+            # landed: raise the head to levitate
+            return INPUT_SPACE_PRESSED
+        if state == STATE_ESCAPED_PIT_MOVING:
+            return INPUT_UP  # walk clear of the pit
+        if state != STATE_WALKING:
+            return 0  # intro, head raise animations
+
+        if self.goal == "wander":
+            return self._wander()
+        if self.goal == "pit":
+            return self._fall_into_pit()
+        return self._drain()
+
+    def _get_position(self):
+        # e.t.'s screen id and position in the play area
+        level = self.simulation.level_manager.current_level
+        center_x, center_y, center_width, center_height = get_center_area(self.simulation.screen_width, level)
+        return self.table.ids[level], self.simulation.et.x - center_x, self.simulation.et.y - center_y
+
+    def _go_to(self, level_id, x, y, target_level_ids):
+        # returns the next move towards one of the target screens (None if there is no route)
+        if self.target_level_id is None:
+            reachable = [target_id for target_id in target_level_ids
+                         if target_id != level_id and self.planner.get_cost(level_id, x, y, target_id) is not None]
+            if not reachable:
+                return None
+            self.target_level_id = self.random.choice(reachable)
+        input_bits = self.planner.get_next_move(level_id, x, y, self.target_level_id)
+        return input_bits or None
+
+    def _wander(self):
+        level_id, x, y = self._get_position()
+        if level_id == self.target_level_id:
+            self.start_goal()
+            return 0
+        input_bits = self._go_to(level_id, x, y, range(len(self.table.names)))
+        if input_bits is None:
+            self.start_goal()
+            return 0
+        return input_bits
+
+    def _fall_into_pit(self):
+        if self.fell:
+            # back on the ground after levitating out
+            self.start_goal()
+            return 0
+        level_id, x, y = self._get_position()
+        pit_rects = self.table.level_pit_rects[level_id]
+        if not pit_rects:
+            input_bits = self._go_to(level_id, x, y, self.pit_level_ids)
+            if input_bits is None:
+                self.start_goal()
+                return 0
+            return input_bits
+
+        # walk (no run) towards the middle of a pit of this screen
+        if self.pit_rect not in pit_rects:
+            self.pit_rect = self.random.choice(pit_rects)
+        pit_x, pit_y, pit_width, pit_height = self.pit_rect
+        et_image = self.simulation.et.image
+        dx = pit_x + pit_width / 2 - (x + et_image.get_width() / 2)
+        dy = pit_y + pit_height / 2 - (y + et_image.get_height() / 2)
+        input_bits = 0
+        if dx < -1:
+            input_bits |= INPUT_LEFT
+        elif dx > 1:
+            input_bits |= INPUT_RIGHT
+        if dy < -1:
+            input_bits |= INPUT_UP
+        elif dy > 1:
+            input_bits |= INPUT_DOWN
+        return input_bits
+
+    def _drain(self):
+        if self.simulation.counter.value <= self.drain_until:
+            self.start_goal()
+            return 0
+        if self.drain_frames <= 0:
+            # a new stretch: some direction, running or not, for a while
+            self.drain_frames = self.random.randint(10, 120)
+            self.drain_arrows = self.random.choice(ARROWS)
+            if self.random.random() < 0.5:
+                self.drain_arrows |= INPUT_SPACE
+            if self.random.random() < 0.1:
+                # stand still and raise the head
+                self.drain_arrows = 0
+                return INPUT_SPACE_PRESSED
+        self.drain_frames -= 1
+        return self.drain_arrows
+
+
+def soak(duration=None, frames=None, render=False, goals=None, seed=None,
+         report_interval=REPORT_INTERVAL, output=None, report=print):
+    """plays games back to back until duration seconds or frames frames have gone by.
+
+    calls report(line) every report_interval seconds and returns the samples
+    (dicts of elapsed time, frames, fps, rss, allocated blocks, games, pit falls, screen changes).
+    """
+    if render:
+        pygame.display.init()
+        simulation = Simulation(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+        renderer = DirtyRectRenderer(simulation)
+    else:
+        simulation = Simulation()
+        renderer = None
+    player = AutoPlayer(simulation, goals, seed)
+    simulation.reset()
+    step = simulation.step
+    game_over = simulation.game_state_manager.is_game_over
+
+    samples = []
+    output_file = open(output, "w") if output else None
+    report(f"{'seconds':>9} {'frames':>11} {'fps':>9} {'rss MiB':>9} {'blocks':>10} {'games':>6} {'pit falls':>9} {'screens':>8}")
+    games = 1
+    pit_falls = 0
+    screen_changes = 0
+    frame = 0
+    events = []
+    start_time = last_time = time.perf_counter()
+    last_frame = 0
+    try:
+        while True:
+            if game_over():
+                simulation.reset()
+                games += 1
+                events = []
+            events = step(player.get_input(events))
+            if renderer is not None:
+                renderer.render()
+            frame += 1
+            if "PIT_FALL" in events:
+                pit_falls += 1
+            if "LEVEL_CHANGE" in events:
+                screen_changes += 1
+
+            # check the clock every 256 frames only
+            if frame & 255 and frame != frames:
+                continue
+            now = time.perf_counter()
+            done = (frames is not None and frame >= frames) or (duration is not None and now - start_time >= duration)
+            if now - last_time < report_interval and not done:
+                continue
+            rss = get_rss()
+            sample = {
+                "seconds": round(now - start_time, 3),
+                "frames": frame,
+                "fps": round((frame - last_frame) / (now - last_time), 1),
+                "rss": rss,
+                "blocks": sys.getallocatedblocks(),
+                "games": games,
+                "pit_falls": pit_falls,
+                "screen_changes": screen_changes,
+            }
+            samples.append(sample)
+            if output_file is not None:
+                output_file.write(json.dumps(sample) + "\n")
+                output_file.flush()
+            rss_text = f"{rss / 2 ** 20:9.1f}" if rss is not None else f"{'-':>9}"
+            report(f"{sample['seconds']:9.1f} {frame:11} {sample['fps']:9.0f} {rss_text} {sample['blocks']:10} "
+                   f"{games:6} {pit_falls:9} {screen_changes:8}")
+            last_time = now
+            last_frame = frame
+            if done:
+                break
+    finally:
+        if output_file is not None:
+            output_file.close()
+    return samples
+
+
+def summarize(samples):
+    """returns a line comparing the first and the last report: memory growth and throughput"""
+    if len(samples) < 2:
+        return "not enough reports to compare, run longer or lower --report-interval"
+    first, last = samples[0], samples[-1]
+    parts = [f"fps {first['fps']:.0f} -> {last['fps']:.0f} ({(last['fps'] / first['fps'] - 1) * 100:+.1f}%)",
+             f"allocated blocks {last['blocks'] - first['blocks']:+d}"]
+    if first["rss"] is not None and last["rss"] is not None:
+        parts.append(f"rss {(last['rss'] - first['rss']) / 2 ** 20:+.1f} MiB")
+    return "since the first report: " + ", ".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="a bot that plays the headless game, for soak testing")
+    parser.add_argument("--duration", type=float, metavar="SECONDS", help="how long to play (default: 60 s)")
+    parser.add_argument("--frames", type=int, help="how many frames to play")
+    parser.add_argument("--render", action="store_true", help="draw every frame on an offscreen surface")
+    parser.add_argument("--goals", metavar="GOAL,...", help=f"goals to take in turn, among {', '.join(GOALS)} (default: random)")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL, metavar="SECONDS",
+                        help="seconds between reports")
+    parser.add_argument("--output", metavar="PATH", help="write the reports to a JSON lines file")
+    args = parser.parse_args(argv)
+    goals = args.goals.split(",") if args.goals else None
+    for goal in goals or ():
+        if goal not in GOALS:
+            parser.error(f"unknown goal {goal!r}")
+    duration = args.duration
+    if duration is None and args.frames is None:
+        duration = 60.0
+
+    samples = soak(duration, args.frames, args.render, goals, args.seed, args.report_interval, args.output)
+    print(summarize(samples))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
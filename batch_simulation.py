@@ -0,0 +1,484 @@
+# batch_simulation.py
+import numpy as np
+from graphics import get_center_area, SCREEN_WIDTH
+from controls import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN, INPUT_SPACE, INPUT_SPACE_PRESSED
+from level_manager import LevelManager
+from collision_grid import LevelPitGrids
+from player import ETState, FINISHED_HEAD_RAISE_STATES
+from simulation import Simulation
+
+# event flags returned by BatchSimulation.step, one bit per Simulation event
+EVENT_STEP = 1
+EVENT_HEAD_RAISE = 2
+EVENT_FALL_COMPLETE = 4
+EVENT_ESCAPE_PIT = 8
+EVENT_PIT_FALL = 16
+EVENT_LEVEL_CHANGE = 32
+EVENT_GAME_OVER = 64
+
+# event flag for each Simulation event name
+EVENT_FLAGS = {
+    "STEP": EVENT_STEP,
+    "HEAD_RAISE": EVENT_HEAD_RAISE,
+    "FALL_COMPLETE": EVENT_FALL_COMPLETE,
+    "ESCAPE_PIT": EVENT_ESCAPE_PIT,
+    "PIT_FALL": EVENT_PIT_FALL,
+    "LEVEL_CHANGE": EVENT_LEVEL_CHANGE,
+    "GAME_OVER": EVENT_GAME_OVER,
+}
+
+# e.t. sprite heights (every sprite is 48 wide)
+ET_WIDTH = 48
+IDLE_HEIGHT = 48
+HEAD_RAISE_HEIGHTS = np.array([54, 60, 66, 72, 66, 60, 54], dtype=np.int16)
+HEAD_LOCKED_HEIGHT = 72  # head_raise_3, used while levitating
+
+# e.t. movement constants (same values as ET)
+SPEED = 1.5
+BOOST_SPEED = 5.2
+PIT_FALL_SPEED = 6.65
+LEVITATION_SPEED = 2
+HEAD_RAISE_SPEED = 5
+STEP_THRESHOLD = 1.0
+
+# counter costs (same values as Counter)
+STEP_COST = 1
+HEAD_RAISE_COST = 19
+FALL_COST = 269
+
+# by state, the state a head lowering ends in (other states map to themselves)
+_FINISHED_STATES = np.array([FINISHED_HEAD_RAISE_STATES.get(state, state) for state in ETState], dtype=np.int8)
+
+# ET.handle_input results, stored per instance while stepping
+_NO_RESULT = 0
+_STEP = 1
+_HEAD_RAISE = 2
+_FALL_COMPLETE = 3
+_ESCAPE_PIT = 4
+
+
+class BatchSimulation:
+    """steps N independent games in lockstep, with the whole state held in NumPy arrays.
+
+    this is a vectorized port of ET.handle_input and the Simulation level, pit and
+    boundary logic, and gives the same positions, counters, levels and events as N
+    scalar Simulation instances fed the same inputs. games start where
+    Simulation.reset(skip_intro=True) leaves them: the intro and the title screen are
+    not part of the batch, and there are no sprites or sounds (only sprite heights,
+    which the collision tests depend on).
+    """
+
+    def __init__(self, n, level_manager=None):
+        self.n = n
+        self._compile_levels(level_manager if level_manager is not None else LevelManager())
+        self.center_x, self.center_y, self.center_width, self.center_height = get_center_area(SCREEN_WIDTH, "FOREST1")
+        self._start_state = self._read_start_state()
+        self.reset()
+
+    def _compile_levels(self, level_manager):
+        # integer level ids, the [level, direction] adjacency table and padded pit rects
+        # (boundary directions 0-3 are the adjacency columns right, left, up, down)
+        table = level_manager.table
+        self.level_names = table.names
+        self.level_ids = table.ids
+        self.pit_level = self.level_ids["PIT"]
+        self.connections = table.connections
+        self.pit_rects = table.get_padded_pit_rects()
+        self.pit_grids = LevelPitGrids(table.level_pit_rects)
+
+    def _read_start_state(self):
+        # run one scalar game through the intro to get the state every batch game starts in
+        simulation = Simulation()
+        simulation.reset(skip_intro=True)
+        return simulation
+
+    def reset(self):
+        """puts every game at the start of play, right after the spaceship intro"""
+        n = self.n
+        start = self._start_state
+        et = start.et
+
+        # position and level
+        self.x = np.full(n, et.x, dtype=np.float64)
+        self.y = np.full(n, et.y, dtype=np.float64)
+        self.image_height = np.full(n, et.image.get_height(), dtype=np.int16)
+        self.level = np.full(n, self.level_ids[start.level_manager.current_level], dtype=np.int16)
+
+        # counter and game over
+        self.counter = np.full(n, start.counter.value, dtype=np.int32)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        # e.t.'s state (ETState values)
+        self.state = np.full(n, et.state, dtype=np.int8)
+
+        # walking animation
+        self.walk_frame = np.zeros(n, dtype=np.int8)
+        self.walk_counter = np.zeros(n, dtype=np.int8)
+        self.walk_anim_speed = np.full(n, et.walk_anim_speed, dtype=np.int8)
+
+        # head raising
+        self.head_raise_frame = np.zeros(n, dtype=np.int8)
+        self.head_raise_counter = np.zeros(n, dtype=np.int8)
+        self.head_raise_just_started = np.zeros(n, dtype=bool)
+
+        # pit falling and escaping
+        self.finish_frame = np.full(n, 4, dtype=np.int8)
+        self.finish_counter = np.zeros(n, dtype=np.int8)
+        self.pit_target_y = np.zeros(n, dtype=np.float64)
+        self.pit_escape_y = np.zeros(n, dtype=np.float64)
+        self.pit_bottom_y = np.zeros(n, dtype=np.float64)
+        self.pit_left_limit = np.zeros(n, dtype=np.float64)
+        self.pit_right_limit = np.zeros(n, dtype=np.float64)
+
+        # level manager pit tracking (pit index -1: no pit yet)
+        self.pit_escape_level = np.full(n, -1, dtype=np.int16)
+        self.current_pit = np.full(n, -1, dtype=np.int16)
+        self.current_pit_bounds = np.zeros((n, 4), dtype=np.int32)
+
+    def step(self, input_bits):
+        """advances every game by one frame.
+
+        input_bits is an array of N input bitmasks (see controls.py); returns an array
+        of N event bitmasks (EVENT_* flags).
+        """
+        input_bits = np.asarray(input_bits)
+        left = (input_bits & INPUT_LEFT) != 0
+        right = (input_bits & INPUT_RIGHT) != 0
+        up = (input_bits & INPUT_UP) != 0
+        down = (input_bits & INPUT_DOWN) != 0
+        space = (input_bits & INPUT_SPACE) != 0
+        space_pressed_once = (input_bits & INPUT_SPACE_PRESSED) != 0
+        any_arrow = left | right | up | down
+
+        active = ~self.game_over
+        on_pit_screen = self.level == self.pit_level
+        result = np.zeros(self.n, dtype=np.int8)
+
+        # the ET.handle_input handler of each state, as masks (pit, escaped and walking share one)
+        state = self.state
+        finishing = active & np.isin(state, (ETState.FINISHING_HEAD_RAISE, ETState.PIT_FINISHING_HEAD_RAISE, ETState.FALLING_FINISHING_HEAD_RAISE))
+        raising = active & (state == ETState.HEAD_RAISE)
+        falling = active & ((state == ETState.FALLING) | (state == ETState.FALLING_HEAD_RAISE))
+        levitating = active & (state == ETState.LEVITATING)
+        rest = active & np.isin(state, (ETState.PIT, ETState.PIT_HEAD_RAISE, ETState.ESCAPED_PIT_MOVING, ETState.WALKING))
+
+        self._step_finishing_head_raise(finishing)
+        self._step_head_raise(raising, result)
+        self._step_falling(falling, space_pressed_once, result)
+        self._step_levitation(levitating, up, down, result)
+        self._step_movement(rest, left, right, up, down, space, space_pressed_once, any_arrow, result)
+
+        events = self._apply_results(active, result)
+
+        # pit screen: escaping returns to the level e.t. fell from
+        self._escape_pit(active & on_pit_screen & (result == _ESCAPE_PIT), events)
+
+        # other screens: pit escape clearance, pit collisions and level transitions
+        on_level = active & ~on_pit_screen
+        escaped = self.state == ETState.ESCAPED_PIT_MOVING
+        self._check_pit_escape_clearance(on_level & escaped)
+        self._check_pits(on_level & ~escaped, events)
+        self._check_level_boundaries(on_level, events)
+
+        return events
+
+    def _step_finishing_head_raise(self, mask):
+        # frames 4 to 6 of the head raise after landing from levitation, no movement
+        frame = self.finish_frame
+        showing = frame <= 6
+        height = np.where(showing, HEAD_RAISE_HEIGHTS[np.clip(frame, 0, 6)], IDLE_HEIGHT)
+        counter = self.finish_counter + 1
+        advance = mask & (counter >= HEAD_RAISE_SPEED)
+
+        self.finish_counter = np.where(mask, np.where(advance, 0, counter), self.finish_counter).astype(np.int8)
+        self.finish_frame = np.where(advance & showing, frame + 1, frame).astype(np.int8)
+        self.state = np.where(advance & ~showing, _FINISHED_STATES[self.state], self.state).astype(np.int8)
+        self.image_height = np.where(mask, height, self.image_height).astype(np.int16)
+
+    def _step_head_raise(self, mask, result):
+        # full head raise animation outside the pit, no movement
+        result[mask & self.head_raise_just_started] = _HEAD_RAISE
+        self.head_raise_just_started &= ~mask
+
+        self._advance_head_raise(mask, in_pit=False)
+
+    def _advance_head_raise(self, mask, in_pit):
+        # one frame of head raise animation, returns the instances whose frame advanced
+        counter = self.head_raise_counter + 1
+        advance = mask & (counter >= HEAD_RAISE_SPEED)
+        frame = np.where(advance, self.head_raise_frame + 1, self.head_raise_frame)
+        self.head_raise_counter = np.where(mask, np.where(advance, 0, counter), self.head_raise_counter).astype(np.int8)
+
+        if in_pit:
+            # in pit: stop at frame 3 and start levitation
+            levitate = advance & (frame == 3)
+            self.state[levitate] = ETState.LEVITATING
+            self.y = np.where(levitate, self.y - 9, self.y)
+            shown = mask & ~levitate & (frame < len(HEAD_RAISE_HEIGHTS))
+            self.image_height = np.where(levitate, HEAD_LOCKED_HEIGHT, self.image_height)
+        else:
+            # outside pit: play full animation then return to idle
+            done = advance & (frame >= len(HEAD_RAISE_HEIGHTS))
+            self.state[done] = ETState.WALKING
+            frame = np.where(done, 0, frame)
+            shown = mask & ~done
+            self.image_height = np.where(done, IDLE_HEIGHT, self.image_height)
+
+        self.head_raise_frame = frame.astype(np.int8)
+        self.image_height = np.where(shown, HEAD_RAISE_HEIGHTS[np.clip(frame, 0, 6)], self.image_height).astype(np.int16)
+
+    def _step_falling(self, mask, space_pressed_once, result):
+        # falling into the pit, space starts a head raise to levitate before the bottom
+        start = mask & space_pressed_once & (self.state == ETState.FALLING)
+        self.state[start] = ETState.FALLING_HEAD_RAISE
+        self.head_raise_frame[start] = 0
+        self.head_raise_counter[start] = 0
+        result[start] = _HEAD_RAISE
+        mask = mask & ~start
+
+        # head raise animation during the fall
+        raising = mask & (self.state == ETState.FALLING_HEAD_RAISE)
+        counter = self.head_raise_counter + 1
+        advance = raising & (counter >= HEAD_RAISE_SPEED)
+        frame = np.where(advance, self.head_raise_frame + 1, self.head_raise_frame)
+        self.head_raise_counter = np.where(raising, np.where(advance, 0, counter), self.head_raise_counter).astype(np.int8)
+        self.head_raise_frame = frame.astype(np.int8)
+
+        # when we reach frame 3, then we stop the fall
+        levitate = advance & (frame == 3)
+        self.state[levitate] = ETState.LEVITATING
+        self.y = np.where(levitate, self.y - 9, self.y)
+
+        # keep falling, with or without the head raise
+        raising &= ~levitate
+        still_falling = mask & ~levitate
+        self.image_height = np.where(raising, HEAD_RAISE_HEIGHTS[np.clip(frame, 0, 6)],
+                                     np.where(still_falling, IDLE_HEIGHT, self.image_height)).astype(np.int16)
+        self.y = np.where(still_falling, self.y + PIT_FALL_SPEED, self.y)
+
+        # check if e.t. has reached the bottom of the pit
+        landed = still_falling & (self.y >= self.pit_target_y)
+        self.y = np.where(landed, self.pit_target_y, self.y)
+        # a head raise goes on at the bottom
+        self.state = np.where(landed, np.where(raising, ETState.PIT_HEAD_RAISE, ETState.PIT), self.state).astype(np.int8)
+        result[landed] = _FALL_COMPLETE
+
+    def _step_levitation(self, mask, up, down, result):
+        # levitating in the pit, up/down move e.t. until he leaves the pit or lands
+        old_y = self.y
+        y = np.where(mask & up, self.y - LEVITATION_SPEED, self.y)
+        y = np.where(mask & down, y + LEVITATION_SPEED, y)
+        self.y = y
+        result[mask & (np.abs(y - old_y) >= STEP_THRESHOLD - 0.5)] = _STEP
+        self.image_height = np.where(mask, HEAD_LOCKED_HEIGHT, self.image_height)
+
+        # check if et reached the top of the pit (escaped the pit?)
+        escaped = mask & (y - (HEAD_LOCKED_HEIGHT - IDLE_HEIGHT) <= self.pit_escape_y)
+        self.state[escaped] = ETState.PIT
+        self.image_height = np.where(escaped, IDLE_HEIGHT, self.image_height).astype(np.int16)
+        result[escaped] = _ESCAPE_PIT
+
+        # check if et reached the bottom platform of the pit
+        landed = mask & ~escaped & (y + IDLE_HEIGHT >= self.pit_bottom_y)
+        self.state[landed] = ETState.PIT_FINISHING_HEAD_RAISE
+        self.finish_frame[landed] = 4
+        self.finish_counter[landed] = 0
+
+    def _step_movement(self, mask, left, right, up, down, space, space_pressed_once, any_arrow, result):
+        # walking and running, in and out of the pit
+        in_pit = (self.state == ETState.PIT) | (self.state == ETState.PIT_HEAD_RAISE)
+
+        # start head raise in pit (frames 0 to 3) if pressing space while standing
+        start = mask & (self.state == ETState.PIT) & space_pressed_once & ~any_arrow
+        self.state[start] = ETState.PIT_HEAD_RAISE
+        self.head_raise_frame[start] = 0
+        self.head_raise_counter[start] = 0
+        self.head_raise_just_started |= start
+        result[start] = _HEAD_RAISE
+        mask = mask & ~start
+
+        # normal movement speed (with boost when space is held), no run allowed in pit
+        speed = np.where(in_pit | ~space, SPEED, BOOST_SPEED)
+        self.walk_anim_speed = np.where(mask, np.where(in_pit | ~space, 3, 2), self.walk_anim_speed).astype(np.int8)
+        old_x, old_y = self.x, self.y
+
+        # escaped pit moving: free movement, image stays locked to head_raise_3
+        escaped = mask & (self.state == ETState.ESCAPED_PIT_MOVING)
+        x = np.where(escaped & left, self.x - speed, self.x)
+        x = np.where(escaped & right, x + speed, x)
+        y = np.where(escaped & up, self.y - speed, self.y)
+        y = np.where(escaped & down, y + speed, y)
+        self.image_height = np.where(escaped, HEAD_LOCKED_HEIGHT, self.image_height)
+        moved = np.sqrt((x - old_x) ** 2 + (y - old_y) ** 2) >= STEP_THRESHOLD
+        result[escaped & moved] = _STEP
+        mask = mask & ~escaped
+
+        # trigger head raise animation if standing still and pressing space
+        start = mask & (self.state == ETState.WALKING) & space_pressed_once & ~any_arrow
+        self.state[start] = ETState.HEAD_RAISE
+        self.head_raise_frame[start] = 0
+        self.head_raise_counter[start] = 0
+        self.head_raise_just_started |= start
+
+        # left/right movement, limited by the pit walls in the pit
+        go_left = mask & left & (~in_pit | (x > self.pit_left_limit))
+        x = np.where(go_left, x - speed, x)
+        go_right = mask & right & (~in_pit | (x < self.pit_right_limit))
+        x = np.where(go_right, x + speed, x)
+
+        # up/down movement (only outside pit)
+        go_up = mask & up & ~in_pit
+        y = np.where(go_up, y - speed, y)
+        go_down = mask & down & ~in_pit
+        y = np.where(go_down, y + speed, y)
+        self.x, self.y = x, y
+        moving = go_left | go_right | go_up | go_down
+
+        moved = np.sqrt((x - old_x) ** 2 + (y - old_y) ** 2) >= STEP_THRESHOLD
+        result[mask & (self.state == ETState.PIT) & moved] = _STEP
+
+        # walking animation (all walk and idle frames are the same height)
+        walking = mask & moving
+        counter = self.walk_counter + 1
+        advance = walking & (counter >= self.walk_anim_speed)
+        self.walk_counter = np.where(walking, np.where(advance, 0, counter), self.walk_counter).astype(np.int8)
+        self.walk_frame = np.where(advance, (self.walk_frame + 1) % 3, self.walk_frame).astype(np.int8)
+        self.image_height = np.where(mask, IDLE_HEIGHT, self.image_height)
+
+        # play head raise animation if it's currently active
+        raising = mask & ((self.state == ETState.PIT_HEAD_RAISE) | (self.state == ETState.HEAD_RAISE))
+        self._advance_head_raise(raising & in_pit, in_pit=True)
+        self._advance_head_raise(raising & ~in_pit, in_pit=False)
+
+        # check if e.t. moved enough to count as a step
+        result[mask & ~raising & ~in_pit & moved] = _STEP
+
+    def _apply_results(self, active, result):
+        # counter decrements and events for the handle_input results
+        events = np.zeros(self.n, dtype=np.uint8)
+        events[result == _STEP] |= EVENT_STEP
+        events[result == _HEAD_RAISE] |= EVENT_HEAD_RAISE
+        events[result == _FALL_COMPLETE] |= EVENT_FALL_COMPLETE
+        events[result == _ESCAPE_PIT] |= EVENT_ESCAPE_PIT
+
+        cost = np.choose(result, (0, STEP_COST, HEAD_RAISE_COST, FALL_COST, 0))
+        self.counter = np.maximum(0, self.counter - cost).astype(np.int32)
+        game_over = active & (cost > 0) & (self.counter == 0)
+        self.game_over |= game_over
+        events[game_over] |= EVENT_GAME_OVER
+        return events
+
+    def _escape_pit(self, mask, events):
+        # return to the level e.t. fell from, centered on the pit he fell into
+        mask = mask & (self.pit_escape_level >= 0)
+        pit_x, pit_y, pit_width, pit_height = self.current_pit_bounds.T
+        has_pit = self.current_pit >= 0
+        center_x = np.where(has_pit, self.center_x + pit_x + (pit_width - ET_WIDTH) // 2,
+                            self.center_x + (768 - ET_WIDTH) // 2)
+        center_y = np.where(has_pit, self.center_y + pit_y + (pit_height - self.image_height) // 2,
+                            self.center_y + (360 - self.image_height) // 2)
+
+        self.level = np.where(mask, self.pit_escape_level, self.level).astype(np.int16)
+        self.state[mask] = ETState.ESCAPED_PIT_MOVING
+        self.x = np.where(mask, center_x, self.x)
+        self.y = np.where(mask, center_y, self.y)
+        self.image_height = np.where(mask, HEAD_LOCKED_HEIGHT, self.image_height).astype(np.int16)
+        events[mask] |= EVENT_LEVEL_CHANGE
+
+    def _check_pit_escape_clearance(self, mask):
+        # e.t. stays in head_raise_3 until his hitbox is clear of the pit he escaped
+        rect_x = self.x - self.center_x
+        rect_y = self.y - self.center_y
+        height = self.image_height
+        pit_x, pit_y, pit_width, pit_height = self.current_pit_bounds.T
+        has_pit = self.current_pit >= 0
+
+        # detect which direction ET escaped from pit
+        escaped_upward = np.where(has_pit, rect_y + height <= pit_y + 1, self.y < self.center_y + 180)
+        escaped_downward = np.where(has_pit, rect_y > pit_y + pit_height, self.y > self.center_y + 180)
+
+        # upward: test from et's head, downward: test head clearance, sideways: full hitbox
+        test_y = np.where(escaped_upward, rect_y + height, np.where(escaped_downward, rect_y, rect_y - 1))
+        test_height = np.where(escaped_upward, 1, np.where(escaped_downward, 16, height + 1 + 16))
+
+        collision = (has_pit &
+                     (rect_x < pit_x + pit_width) &
+                     (rect_x + ET_WIDTH > pit_x) &
+                     (test_y < pit_y + pit_height) &
+                     (test_y + test_height > pit_y))
+
+        clear = mask & ~collision
+        self.state[clear] = ETState.FINISHING_HEAD_RAISE
+        self.finish_frame[clear] = 4
+        self.finish_counter[clear] = 0
+
+    def _check_pits(self, mask, events):
+        # one occupancy grid lookup per game, then which pit (first in level order) for the hits
+        rect_x = self.x - self.center_x
+        rect_y = self.y - self.center_y
+        fall = mask & self.pit_grids.overlaps_batch(self.level, rect_x, rect_y, ET_WIDTH, self.image_height)
+        if not fall.any():
+            return
+
+        pits = self.pit_rects[self.level[fall]]
+        pit_x, pit_y, pit_width, pit_height = pits[..., 0], pits[..., 1], pits[..., 2], pits[..., 3]
+        fall_x = rect_x[fall][:, None]
+        fall_y = rect_y[fall][:, None]
+        overlap = ((fall_x < pit_x + pit_width) &
+                   (fall_x + ET_WIDTH > pit_x) &
+                   (fall_y < pit_y + pit_height) &
+                   (fall_y + self.image_height[fall][:, None] > pit_y))
+        pit = overlap.argmax(axis=1)
+
+        self.pit_escape_level = np.where(fall, self.level, self.pit_escape_level).astype(np.int16)
+        self.current_pit[fall] = pit
+        self.current_pit_bounds[fall] = pits[np.arange(len(pit)), pit]
+        self.level = np.where(fall, self.pit_level, self.level).astype(np.int16)
+        events[fall] |= EVENT_PIT_FALL
+
+        # set up parameters for falling into the pit
+        height = self.image_height
+        self.x = np.where(fall, self.center_x + (self.center_width - ET_WIDTH) // 2, self.x)
+        self.y = np.where(fall, self.center_y, self.y)
+        # a fall during a head lowering comes after it
+        self.state = np.where(fall & (self.state != ETState.FALLING_FINISHING_HEAD_RAISE),
+                              np.where(self.state == ETState.FINISHING_HEAD_RAISE, ETState.FALLING_FINISHING_HEAD_RAISE, ETState.FALLING),
+                              self.state).astype(np.int8)
+        self.pit_target_y = np.where(fall, self.center_y + 360 - height, self.pit_target_y)
+        self.pit_escape_y = np.where(fall, self.center_y, self.pit_escape_y)
+        self.pit_bottom_y = np.where(fall, self.center_y + 360, self.pit_bottom_y)
+        self.pit_left_limit = np.where(fall, self.center_x + 192, self.pit_left_limit)
+        self.pit_right_limit = np.where(fall, self.center_x + self.center_width - 192 - ET_WIDTH, self.pit_right_limit)
+        # a head raise cut short by the fall starts over
+        self.head_raise_frame[fall] = 0
+        self.head_raise_counter[fall] = 0
+        self.head_raise_just_started &= ~fall
+
+    def _check_level_boundaries(self, mask, events):
+        # the first border crossed picks the direction, which must lead somewhere
+        height = self.image_height
+        direction = np.select(
+            [self.x > self.center_x + self.center_width - ET_WIDTH,
+             self.x < self.center_x,
+             self.y < self.center_y,
+             self.y > self.center_y + self.center_height - height],
+            [0, 1, 2, 3], default=-1)
+        crossed = mask & (direction >= 0)
+        if not crossed.any():
+            return
+
+        next_level = self.connections[self.level, np.maximum(direction, 0)]
+        moving = crossed & (next_level >= 0)
+        self.level = np.where(moving, next_level, self.level).astype(np.int16)
+        events[moving] |= EVENT_LEVEL_CHANGE
+
+        # spawn e.t. on the opposite side of the new level
+        cx, cy, cw, ch = self.center_x, self.center_y, self.center_width, self.center_height
+        spawn_x = np.choose(np.maximum(direction, 0), (cx + 10, cx + cw - ET_WIDTH - 10, cx + cw // 2, cx + cw // 2))
+        spawn_y = np.choose(np.maximum(direction, 0), (cy + ch // 2, cy + ch // 2, cy + ch - height - 10, cy + 10))
+        self.x = np.where(moving, spawn_x, self.x)
+        self.y = np.where(moving, spawn_y, self.y)
+
+        # reset E.T. for a level transition (his head stays locked until he is clear of the pit he escaped)
+        self.state = np.where(moving & (self.state != ETState.ESCAPED_PIT_MOVING), ETState.WALKING, self.state).astype(np.int8)
+        self.image_height = np.where(moving, IDLE_HEIGHT, self.image_height).astype(np.int16)
@@ -0,0 +1,310 @@
+# benchmark.py
+#
+# headless benchmarks of the game logic on fixed, scripted scenarios:
+#
+#     python benchmark.py                    run every scenario, compare with the baseline
+#     python benchmark.py --save-baseline    run and store the results as the new baseline
+#     python benchmark.py pit_escape         run some scenarios only
+#
+# exits with status 1 when a scenario runs more than --tolerance slower than its baseline.
+# baselines are machine specific, save one on the machine you compare on. timings also depend
+# on the string hash seed (dict and set layouts), so the benchmarks run with a fixed one.
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from graphics import get_center_area
+from controls import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN, INPUT_SPACE_PRESSED
+from player import (STATE_FALLING, STATE_LEVITATING, STATE_ESCAPED_PIT_MOVING, STATE_FINISHING_HEAD_RAISE,
+                    STATE_FALLING_HEAD_RAISE, STATE_PIT_HEAD_RAISE, STATE_FALLING_FINISHING_HEAD_RAISE)
+from simulation import Simulation
+
+BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.30  # allowed fps drop against the baseline
+HASH_SEED = "0"  # PYTHONHASHSEED the benchmarks run with
+DEFAULT_REPEAT = 5        # timed runs per scenario at least, the fastest one counts
+DEFAULT_MIN_TIME = 2.0    # seconds each scenario is timed for at least (short ones run more often)
+CONFIRM_RUNS = 2          # times a scenario below the baseline is timed again before it counts as a regression
+
+ARROWS = {"right": INPUT_RIGHT, "left": INPUT_LEFT, "up": INPUT_UP, "down": INPUT_DOWN}
+
+# screens walked through, with a pit-free spot (play area coordinates) from which
+# e.t. can walk straight to the edges without touching a pit
+WALK_LANES = {
+    "FOREST1": (360, 156),
+    "FOREST2": (360, 204),
+    "FOREST3": (360, 180),
+    "FOREST4": (240, 20),
+    "FOREST5": (150, 110),
+    "BUILDING": (360, 156),
+}
+# no straight path down from the FOREST5 spot: start that walk below the middle pits
+WALK_LANE_OVERRIDES = {
+    ("FOREST5", "down"): (150, 240),
+}
+
+# where e.t. walks down into a pit (FOREST2, top left pit)
+PIT_APPROACH = ("FOREST2", 150, 50)
+
+MAX_LEG_FRAMES = 20000  # a script that runs longer than this went wrong
+
+
+class Leg:
+    """a setup (untimed) followed by a fixed sequence of input bitmasks (timed)"""
+
+    def __init__(self, setup, inputs):
+        self.setup = setup
+        self.inputs = bytes(inputs)
+
+
+def _start_playing(simulation):
+    simulation.reset(skip_intro=True)
+
+
+def _place_et(level, x, y):
+    # returns a setup that starts a game with e.t. standing at (x, y) on a screen
+    def setup(simulation):
+        simulation.reset(skip_intro=True)
+        simulation.game_state_manager.change_state(level)
+        simulation.level_manager.set_level(level)
+        center_x, center_y, center_width, center_height = get_center_area(simulation.screen_width, level)
+        simulation.et.x = center_x + x
+        simulation.et.y = center_y + y
+    return setup
+
+
+def _script(simulation, setup, policy):
+    # runs a policy (simulation, events -> input bits, or None when done) from a setup,
+    # returns the leg that replays it
+    setup(simulation)
+    inputs = []
+    events = []
+    while True:
+        input_bits = policy(simulation, events)
+        if input_bits is None:
+            return Leg(setup, inputs)
+        if len(inputs) >= MAX_LEG_FRAMES:
+            raise RuntimeError("benchmark script did not finish")
+        inputs.append(input_bits)
+        events = simulation.step(input_bits)
+
+
+def script_intro(simulation):
+    """the spaceship intro of a new game, until e.t. is controllable"""
+    def policy(simulation, events):
+        return 0 if simulation.game_state_manager.is_intro_active() else None
+    return [_script(simulation, Simulation.reset, policy)] * 5
+
+
+def script_forest_walk(simulation):
+    """walks out of every forest screen and the building, through each of their 4 edges"""
+    legs = []
+    for level, lane in WALK_LANES.items():
+        for direction, arrow in ARROWS.items():
+            x, y = WALK_LANE_OVERRIDES.get((level, direction), lane)
+            def policy(simulation, events, arrow=arrow):
+                if "PIT_FALL" in events:
+                    raise RuntimeError("forest walk fell into a pit")
+                return None if "LEVEL_CHANGE" in events else arrow
+            legs.append(_script(simulation, _place_et(level, x, y), policy))
+    return legs
+
+
+def script_pit_escape(simulation):
+    """falls into a pit, levitates out of it and walks clear of it"""
+    def policy(simulation, events):
+        state = simulation.et.state
+        current_state = simulation.game_state_manager.get_current_state()
+        if current_state != "PIT":
+            if state == STATE_ESCAPED_PIT_MOVING:
+                return INPUT_UP  # walk clear of the pit
+            if state == STATE_FINISHING_HEAD_RAISE:
+                return 0
+            # done once back out, otherwise walk into the pit
+            return None if simulation.level_manager.pit_escape_level else INPUT_DOWN
+        if state in (STATE_FALLING, STATE_FALLING_HEAD_RAISE, STATE_FALLING_FINISHING_HEAD_RAISE, STATE_PIT_HEAD_RAISE):
+            return 0
+        if state == STATE_LEVITATING:
+            return INPUT_UP
+        # landed: raise the head to levitate
+        return INPUT_SPACE_PRESSED
+    return [_script(simulation, _place_et(*PIT_APPROACH), policy)] * 5
+
+
+def script_counter_drain(simulation):
+    """paces left and right on FOREST1 until the counter runs out"""
+    def policy(simulation, events):
+        if simulation.game_state_manager.is_game_over():
+            return None
+        return INPUT_LEFT if simulation.frame // 60 % 2 else INPUT_RIGHT
+    return [_script(simulation, _start_playing, policy)]
+
+
+SCENARIOS = {
+    "intro": script_intro,
+    "forest_walk": script_forest_walk,
+    "pit_escape": script_pit_escape,
+    "counter_drain": script_counter_drain,
+}
+
+
+def _time_legs(simulation, legs):
+    # returns the time spent stepping through each leg (without garbage collection, as timeit)
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for leg in legs:
+            leg.setup(simulation)
+            step = simulation.step
+            start_time = time.perf_counter()
+            for input_bits in leg.inputs:
+                step(input_bits)
+            times.append(time.perf_counter() - start_time)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return times
+
+
+def _measure_allocations(simulation, legs):
+    # returns (net memory blocks allocated per frame, peak KiB allocated while stepping)
+    frames = sum(len(leg.inputs) for leg in legs)
+    net_blocks = 0
+    peak = 0
+    tracemalloc.start()
+    try:
+        for leg in legs:
+            leg.setup(simulation)
+            step = simulation.step
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start_blocks = sys.getallocatedblocks()
+            for input_bits in leg.inputs:
+                step(input_bits)
+            net_blocks += sys.getallocatedblocks() - start_blocks
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - start_memory)
+    finally:
+        tracemalloc.stop()
+    return net_blocks / frames, peak / 1024
+
+
+def run_scenarios(names, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """runs scenarios, returns their results by name.
+
+    each scenario is timed at least `repeat` times and for at least min_time seconds, and the
+    fastest run of each of its legs counts. the runs take turns across the scenarios, so a
+    slow stretch of the machine does not fall on every run of one scenario.
+    """
+    runs = {}
+    for name in names:
+        simulation = Simulation()
+        runs[name] = (simulation, SCENARIOS[name](simulation), [])
+    pending = list(names)
+    while pending:
+        for name in pending:
+            simulation, legs, times = runs[name]
+            times.append(_time_legs(simulation, legs))
+        pending = [name for name in pending if len(runs[name][2]) < repeat or sum(map(sum, runs[name][2])) < min_time]
+
+    results = {}
+    for name, (simulation, legs, times) in runs.items():
+        frames = sum(len(leg.inputs) for leg in legs)
+        elapsed = sum(min(leg_times) for leg_times in zip(*times))
+        blocks_per_frame, peak_kib = _measure_allocations(simulation, legs)
+        results[name] = {
+            "frames": frames,
+            "seconds": elapsed,
+            "fps": frames / elapsed,
+            "blocks_per_frame": blocks_per_frame,
+            "peak_kib": peak_kib,
+        }
+    return results
+
+
+def run_scenario(name, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """runs a scenario, returns its results"""
+    return run_scenarios([name], repeat, min_time)[name]
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """returns the scenarios slower than the baseline by more than the tolerance, as messages"""
+    regressions = []
+    for name, scenario_results in results["scenarios"].items():
+        baseline_results = baseline["scenarios"].get(name)
+        if baseline_results is None:
+            continue
+        ratio = scenario_results["fps"] / baseline_results["fps"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {scenario_results['fps']:.0f} fps, "
+                               f"{(1 - ratio) * 100:.1f}% below the baseline ({baseline_results['fps']:.0f} fps)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="headless benchmarks of the game logic")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--output", metavar="PATH", help="write the results to a json file")
+    parser.add_argument("--baseline", metavar="PATH", default=BASELINE_PATH, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed fps drop, as a fraction")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per scenario, at least")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, metavar="SECONDS",
+                        help="seconds each scenario is timed for, at least")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    results = {"python": platform.python_version(), "machine": platform.machine(),
+               "hash_seed": os.environ.get("PYTHONHASHSEED"), "scenarios": {}}
+    results["scenarios"] = run_scenarios(args.scenarios or list(SCENARIOS), args.repeat, args.min_time)
+
+    baseline = None
+    if not args.save_baseline:
+        try:
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            print(f"no baseline at {args.baseline}, run with --save-baseline to store one")
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        # a slow stretch of the machine passes, a regression stays: time the slow scenarios again
+        slow = [name for name, scenario_results in results["scenarios"].items()
+                if compare({"scenarios": {name: scenario_results}}, baseline, args.tolerance)]
+        for name, scenario_results in run_scenarios(slow, args.repeat, args.min_time).items():
+            if scenario_results["fps"] > results["scenarios"][name]["fps"]:
+                results["scenarios"][name] = scenario_results
+        regressions = compare(results, baseline, args.tolerance)
+
+    for name, scenario_results in results["scenarios"].items():
+        print(f"{name:<14} {scenario_results['frames']:>7} frames {scenario_results['fps']:>10.0f} fps "
+              f"{scenario_results['blocks_per_frame']:>8.3f} blocks/frame {scenario_results['peak_kib']:>8.1f} KiB peak")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    if os.environ.get("PYTHONHASHSEED") is None:
+        # the seed is read at interpreter start: run again in a fresh one
+        sys.exit(subprocess.call([sys.executable] + sys.argv, env=dict(os.environ, PYTHONHASHSEED=HASH_SEED)))
+    sys.exit(main())
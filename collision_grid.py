@@ -0,0 +1,171 @@
+# collision_grid.py
+from math import ceil, floor
+import numpy as np
+import pygame
+
+# the play area the pit rects are defined in (relative to the center area)
+PLAY_AREA_WIDTH = 768
+PLAY_AREA_HEIGHT = 360
+
+# pit pixels in the level art (the pit rects are their bounding boxes)
+PIT_COLOR = (0, 68, 0)
+
+# compiled grids, shared by every LevelManager (keyed by the level's pit rects)
+_grid_cache = {}
+
+
+def rects_overlap(rect_a, rect_b):
+    """returns True if two (x, y, width, height) rects overlap"""
+    ax, ay, aw, ah = rect_a
+    bx, by, bw, bh = rect_b
+    return ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by
+
+
+class PitGrid:
+    """a level's pit rects compiled into a per-pixel occupancy table over the play area.
+
+    the table is summed (integral image), so whether a rect touches any pit is four
+    lookups whatever the number of pits. results are exactly the ones of the
+    rect-by-rect overlap test, fractional positions included.
+    """
+
+    def __init__(self, pit_rects, width=PLAY_AREA_WIDTH, height=PLAY_AREA_HEIGHT):
+        self.pit_rects = [tuple(rect) for rect in pit_rects]
+        # grow the grid if a pit reaches past the play area, so no pit is ever cut
+        self.width = max([width] + [pit_x + pit_width for pit_x, pit_y, pit_width, pit_height in self.pit_rects])
+        self.height = max([height] + [pit_y + pit_height for pit_x, pit_y, pit_width, pit_height in self.pit_rects])
+        width, height = self.width, self.height
+
+        occupancy = np.zeros((height, width), dtype=np.int32)
+        for pit_x, pit_y, pit_width, pit_height in self.pit_rects:
+            occupancy[max(pit_y, 0):max(pit_y + pit_height, 0), max(pit_x, 0):max(pit_x + pit_width, 0)] = 1
+
+        # summed[y, x] = occupied pixels above and left of (x, y)
+        self.summed = np.zeros((height + 1, width + 1), dtype=np.int32)
+        self.summed[1:, 1:] = occupancy.cumsum(axis=0).cumsum(axis=1)
+        # flat view for scalar lookups (indexing it returns plain ints)
+        self._summed_flat = memoryview(self.summed.reshape(-1))
+
+    @classmethod
+    def for_rects(cls, pit_rects):
+        """returns the compiled grid for a list of pit rects, compiled once per layout"""
+        key = tuple(tuple(rect) for rect in pit_rects)
+        grid = _grid_cache.get(key)
+        if grid is None:
+            grid = _grid_cache[key] = cls(key)
+        return grid
+
+    def overlaps(self, x, y, width, height):
+        """returns True if the rect touches any pit"""
+        if not self.pit_rects or width <= 0 or height <= 0:
+            return False
+        # pixels touched by the rect, clipped to the grid
+        grid_width = self.width
+        grid_height = self.height
+        x0 = floor(x)
+        x1 = ceil(x + width)
+        y0 = floor(y)
+        y1 = ceil(y + height)
+        x0 = 0 if x0 < 0 else grid_width if x0 > grid_width else x0
+        x1 = 0 if x1 < 0 else grid_width if x1 > grid_width else x1
+        y0 = 0 if y0 < 0 else grid_height if y0 > grid_height else y0
+        y1 = 0 if y1 < 0 else grid_height if y1 > grid_height else y1
+        if x0 == x1 or y0 == y1:
+            return False
+        row = grid_width + 1
+        summed = self._summed_flat
+        return summed[y1 * row + x1] - summed[y0 * row + x1] - summed[y1 * row + x0] + summed[y0 * row + x0] > 0
+
+    def find_pit(self, x, y, width, height):
+        """returns the first pit rect (in level order) the rect touches, or None"""
+        if not self.overlaps(x, y, width, height):
+            return None
+        # only reached on a hit: pick which pit it was
+        for pit_rect in self.pit_rects:
+            if rects_overlap((x, y, width, height), pit_rect):
+                return pit_rect
+        return None
+
+    def overlaps_batch(self, x, y, width, height):
+        """overlaps() for arrays of rects, in one vectorized lookup"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        right = x + width
+        bottom = y + height
+        x0 = np.clip(np.floor(x), 0, self.width).astype(np.intp)
+        x1 = np.clip(np.ceil(right), 0, self.width).astype(np.intp)
+        y0 = np.clip(np.floor(y), 0, self.height).astype(np.intp)
+        y1 = np.clip(np.ceil(bottom), 0, self.height).astype(np.intp)
+        summed = self.summed
+        total = summed[y1, x1] - summed[y0, x1] - summed[y1, x0] + summed[y0, x0]
+        return (total > 0) & (right > x) & (bottom > y)
+
+
+class PitMasks:
+    """a level's pits as pixel masks taken from the level art, for exact tests against sprite masks.
+
+    a pit is the PIT_COLOR pixels of the art inside its rect. the rects bound the pits, so a
+    sprite whose rect misses every rect is rejected by the PitGrid lookup, and a mask is only
+    tested against the pits whose rect the sprite's rect touches.
+    """
+
+    def __init__(self, art, pit_rects, color=PIT_COLOR):
+        self.grid = PitGrid.for_rects(pit_rects)
+        if art.get_bytesize() < 3:
+            # colors are not matched on palette images: threshold a 32 bit copy
+            source, art = art, pygame.Surface(art.get_size(), 0, 32)
+            art.blit(source, (0, 0))
+        art_mask = pygame.mask.from_threshold(art, color, (1, 1, 1, 255))
+        # pit rect: mask of its pixels, in level order
+        self.masks = {}
+        for pit_x, pit_y, pit_width, pit_height in self.grid.pit_rects:
+            mask = pygame.mask.Mask((pit_width, pit_height))
+            mask.draw(art_mask, (-pit_x, -pit_y))
+            self.masks[(pit_x, pit_y, pit_width, pit_height)] = mask
+
+    def touches_pit(self, pit_rect, mask, x, y):
+        """returns True if a mask drawn at (x, y) (whole pixels) covers a pixel of a pit"""
+        pit_x, pit_y, pit_width, pit_height = pit_rect
+        width, height = mask.get_size()
+        if not rects_overlap((x, y, width, height), pit_rect):
+            return False
+        return self.masks[pit_rect].overlap(mask, (x - pit_x, y - pit_y)) is not None
+
+    def find_pit(self, mask, x, y):
+        """returns the first pit rect (in level order) whose pixels a mask drawn at (x, y) covers, or None"""
+        width, height = mask.get_size()
+        if not self.grid.overlaps(x, y, width, height):
+            return None
+        for pit_rect in self.grid.pit_rects:
+            if self.touches_pit(pit_rect, mask, x, y):
+                return pit_rect
+        return None
+
+
+class LevelPitGrids:
+    """the pit grids of several levels stacked together, for batch lookups across levels"""
+
+    def __init__(self, level_pit_rects, width=PLAY_AREA_WIDTH, height=PLAY_AREA_HEIGHT):
+        # level_pit_rects: one list of pit rects per level id
+        self.grids = [PitGrid.for_rects(rects) for rects in level_pit_rects]
+        # every level on the same grid size
+        self.width = max([width] + [grid.width for grid in self.grids])
+        self.height = max([height] + [grid.height for grid in self.grids])
+        self.summed = np.zeros((len(self.grids), self.height + 1, self.width + 1), dtype=np.int32)
+        for level, grid in enumerate(self.grids):
+            self.summed[level, :grid.height + 1, :grid.width + 1] = grid.summed
+            # a smaller grid's last row/column carries on past its edge
+            self.summed[level, grid.height + 1:, :grid.width + 1] = grid.summed[-1]
+            self.summed[level, :, grid.width + 1:] = self.summed[level, :, grid.width:grid.width + 1]
+
+    def overlaps_batch(self, level, x, y, width, height):
+        """for each rect, returns True if it touches a pit of its level"""
+        right = x + width
+        bottom = y + height
+        x0 = np.clip(np.floor(x), 0, self.width).astype(np.intp)
+        x1 = np.clip(np.ceil(right), 0, self.width).astype(np.intp)
+        y0 = np.clip(np.floor(y), 0, self.height).astype(np.intp)
+        y1 = np.clip(np.ceil(bottom), 0, self.height).astype(np.intp)
+        summed = self.summed
+        total = summed[level, y1, x1] - summed[level, y0, x1] - summed[level, y1, x0] + summed[level, y0, x0]
+        return (total > 0) & (right > x) & (bottom > y)
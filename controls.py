@@ -0,0 +1,53 @@
+# controls.py
+import pygame
+
+# input bits - the only keys the game logic reads
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_DOWN = 8
+INPUT_SPACE = 16
+INPUT_SPACE_PRESSED = 32  # space went down this frame (keydown edge)
+
+# bits that describe held keys (the edge bit is passed separately to handle_input)
+HELD_KEYS_MASK = INPUT_LEFT | INPUT_RIGHT | INPUT_UP | INPUT_DOWN | INPUT_SPACE
+
+# key constant for each held input bit
+_KEY_BITS = (
+    (pygame.K_LEFT, INPUT_LEFT),
+    (pygame.K_RIGHT, INPUT_RIGHT),
+    (pygame.K_UP, INPUT_UP),
+    (pygame.K_DOWN, INPUT_DOWN),
+    (pygame.K_SPACE, INPUT_SPACE),
+)
+
+
+class KeyState(dict):
+    """read-only stand-in for pygame.key.get_pressed(), indexed by pygame key constants"""
+
+    def __missing__(self, key):
+        # any key the game does not read is released
+        return False
+
+
+# one shared key state per held-key combination, so stepping never allocates
+_KEY_STATES = tuple(
+    KeyState({key: bool(bits & bit) for key, bit in _KEY_BITS})
+    for bits in range(HELD_KEYS_MASK + 1)
+)
+
+
+def keys_from_bits(input_bits):
+    """returns a key state usable by ET.handle_input for an input bitmask"""
+    return _KEY_STATES[input_bits & HELD_KEYS_MASK]
+
+
+def bits_from_keys(keys, space_pressed_once=False):
+    """packs pygame.key.get_pressed() and the space edge into an input bitmask"""
+    input_bits = 0
+    for key, bit in _KEY_BITS:
+        if keys[key]:
+            input_bits |= bit
+    if space_pressed_once:
+        input_bits |= INPUT_SPACE_PRESSED
+    return input_bits
@@ -1,12 +1,13 @@
 # counter.py
 import pygame
+from asset_bundle import load_image
 
 class Counter:
     def __init__(self):
         # load all digit images (0-9)
         self.digit_images = {}
         for i in range(10):
-            self.digit_images[i] = pygame.image.load(f"assets/images/counter/counter_{i}.png")
+            self.digit_images[i] = load_image(f"assets/images/counter/counter_{i}.png")
         
         # counter properties
         self.value = 9999  # starting value
@@ -17,6 +18,12 @@ class Counter:
         # game state tracking
         self.is_active = False  # counter only appears in game screens (not title)
         
+        # rendered 4-digit strip, rebuilt only when the value changes
+        self.strip = None
+        self.strip_value = None
+        # (value, is_active) last drawn on screen, to tell the renderer when to redraw
+        self.drawn_state = None
+        
     def activate(self):
         # activate the counter when entering game mode
         self.is_active = True
@@ -60,23 +67,35 @@ class Counter:
         # 4 digits + 3 spaces between them
         return (4 * self.digit_width) + (3 * self.digit_spacing)
     
-    def draw(self, screen, screen_width, screen_height, light_blue2_height):
-        # draw the counter in the light blue bar at bottom of screen
-        if not self.is_active:
-            return
-            
-        # get the 4 digits to display
-        digits = self.get_digits()
-        
-        # calculate total width and starting x position for centering
+    def get_rect(self, screen_width, screen_height, light_blue2_height):
+        # screen area of the counter, centered in the light blue bar at bottom of screen
         total_width = self.get_total_width()
         start_x = (screen_width - total_width) // 2
-        
-        # calculate y position (centered in light blue bar)
         y = screen_height - light_blue2_height + (light_blue2_height - self.digit_height) // 2
-        
-        # draw each digit with proper spacing
-        current_x = start_x
-        for digit in digits:
-            screen.blit(self.digit_images[digit], (current_x, y))
-            current_x += self.digit_width + self.digit_spacing
\ No newline at end of file
+        return pygame.Rect(start_x, y, total_width, self.digit_height)
+    
+    def is_dirty(self):
+        # true when what is on screen no longer matches the value or visibility
+        return self.drawn_state != (self.value, self.is_active)
+    
+    def get_strip(self):
+        # the 4 digits with proper spacing on one surface, rebuilt when the value changes
+        if self.strip_value != self.value:
+            if self.strip is None:
+                self.strip = pygame.Surface((self.get_total_width(), self.digit_height), pygame.SRCALPHA)
+            self.strip.fill((0, 0, 0, 0))
+            current_x = 0
+            for digit in self.get_digits():
+                self.strip.blit(self.digit_images[digit], (current_x, 0))
+                current_x += self.digit_width + self.digit_spacing
+            self.strip_value = self.value
+        return self.strip
+    
+    def get_blit(self, screen_width, screen_height, light_blue2_height):
+        # the (surface, dest, area) blit that draws the counter in the light blue bar at bottom of screen,
+        # or None when the counter is hidden; what it draws counts as drawn from now on
+        self.drawn_state = (self.value, self.is_active)
+        if not self.is_active:
+            return None
+        return self.get_strip(), self.get_rect(screen_width, screen_height, light_blue2_height), None
+
@@ -0,0 +1,88 @@
+# debug_log.py
+#
+# structured debug records, kept out of the frame loop's way: record() only stores the
+# record in a ring buffer allocated up front, and a background thread writes the records
+# out as JSON lines. call sites check debug_log.enabled first, so a disabled channel costs
+# one flag check. enable it in the game with:
+#
+#     python main.py --debug-log debug.jsonl
+import json
+import threading
+from time import perf_counter_ns
+
+DEFAULT_CAPACITY = 8192  # records held until the writer thread catches up
+FLUSH_INTERVAL = 0.25    # seconds between writes
+
+
+class DebugChannel:
+    """a ring buffer of (timestamp, event, fields) records, written to a JSONL file by a thread.
+
+    there is one writer (the game loop) and one reader (the flush thread). when the
+    writer laps the reader, the oldest records are lost and counted in `dropped`.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.enabled = False
+        self.records = [None] * capacity
+        self.written = 0   # records recorded since start
+        self.flushed = 0   # records handed to the file (or dropped)
+        self.dropped = 0
+        self._file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._flush_lock = threading.Lock()
+
+    def record(self, event, **fields):
+        """stores a record (call only when enabled)"""
+        self.records[self.written % self.capacity] = (perf_counter_ns(), event, fields)
+        self.written += 1
+
+    def start(self, path, flush_interval=FLUSH_INTERVAL):
+        """enables the channel, writing its records to path"""
+        self.stop()
+        self._file = open(path, "w")
+        self.written = self.flushed = self.dropped = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(flush_interval,), name="debug-log", daemon=True)
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self):
+        """disables the channel and writes out what is left"""
+        self.enabled = False
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def _run(self, flush_interval):
+        while not self._stop_event.wait(flush_interval):
+            self.flush()
+
+    def flush(self):
+        """writes the records recorded since the last flush"""
+        with self._flush_lock:
+            written = self.written
+            start = max(self.flushed, written - self.capacity)
+            pending = [self.records[index % self.capacity] for index in range(start, written)]
+            # records overwritten while they were being copied are lost too
+            overwritten = max(0, self.written - self.capacity - start)
+            lost = start - self.flushed + overwritten
+            self.dropped += lost
+            self.flushed = written
+            lines = [json.dumps({"t_ns": timestamp, "event": event, **fields})
+                     for timestamp, event, fields in pending[overwritten:]]
+            if lost:
+                lines.append(json.dumps({"t_ns": perf_counter_ns(), "event": "dropped", "count": lost}))
+            if lines and self._file is not None:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+
+
+# the game's debug channel, disabled until started
+debug_log = DebugChannel()
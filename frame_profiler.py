@@ -0,0 +1,167 @@
+# frame_profiler.py
+#
+# per-phase frame timing. the game loop brackets each frame with begin_frame/end_frame and
+# marks the end of each phase; the time since the previous mark goes to that phase.
+# timings go to a ring buffer allocated up front, so recording never allocates.
+#
+# call sites check profiler.active first, which is all a frame costs when profiling is off.
+# in the game, F3 toggles profiling, or start it with:
+#
+#     python main.py --profile frames.json   (chrome://tracing / Perfetto trace)
+#     python main.py --profile frames.csv
+import array
+import json
+from time import perf_counter_ns
+import numpy as np
+
+# phases of a frame, in the order they run
+PHASE_EVENTS = 0         # event polling
+PHASE_HANDLE_INPUT = 1   # ET.handle_input (and everything before it in the logic step)
+PHASE_LEVEL_CHECKS = 2   # pit, pit escape and level boundary checks, screen changes
+PHASE_RENDER = 3         # screen background and sprites
+PHASE_COUNTER = 4        # Counter.draw
+PHASE_PRESENT = 5        # display update/flip and clock.tick
+PHASES = ("events", "handle_input", "level_checks", "render", "counter", "present")
+
+SCENES = ("TITLE", "FOREST1", "FOREST2", "FOREST3", "FOREST4", "FOREST5", "PIT", "BUILDING", "HOUSE")
+SCENE_IDS = {scene: scene_id for scene_id, scene in enumerate(SCENES)}
+
+DEFAULT_CAPACITY = 18000  # frames kept, 5 minutes at 60 fps
+
+
+class FrameProfiler:
+    """phase timings of the last `capacity` frames"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.enabled = False  # toggle at any time, applies from the next frame
+        self.active = False   # whether the frame in progress is being recorded
+
+        # ring buffer, one slot per frame
+        self.starts = array.array("q", bytes(8 * capacity))
+        self.totals = array.array("q", bytes(8 * capacity))
+        self.durations = array.array("q", bytes(8 * capacity * len(PHASES)))
+        self.scenes = array.array("B", bytes(capacity))
+        self.count = 0  # frames recorded since the last clear
+
+        # frame in progress
+        self._index = 0
+        self._offset = 0  # of its phases in durations
+        self._frame_start = 0
+        self._last_mark = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def clear(self):
+        self.count = 0
+
+    def begin_frame(self, scene):
+        """starts recording a frame of a scene (a game state name), when enabled"""
+        self.active = self.enabled
+        if not self.active:
+            return
+        self._index = self.count % self.capacity
+        self._offset = offset = self._index * len(PHASES)
+        durations = self.durations
+        for phase in range(len(PHASES)):
+            durations[offset + phase] = 0
+        self.scenes[self._index] = SCENE_IDS[scene]
+        self._frame_start = self._last_mark = perf_counter_ns()
+
+    def mark(self, phase):
+        """ends a phase: the time since the last mark is added to it"""
+        now = perf_counter_ns()
+        self.durations[self._offset + phase] += now - self._last_mark
+        self._last_mark = now
+
+    def end_frame(self):
+        """ends the present phase and the frame"""
+        if not self.active:
+            return
+        self.mark(PHASE_PRESENT)
+        self.starts[self._index] = self._frame_start
+        self.totals[self._index] = self._last_mark - self._frame_start
+        self.count += 1
+        self.active = False
+
+    def get_frames(self):
+        """returns the recorded frames, oldest first, as numpy arrays:
+        (start times, phase durations [frame, phase], frame times, scene ids), in nanoseconds
+        """
+        recorded = min(self.count, self.capacity)
+        order = np.arange(self.count - recorded, self.count) % self.capacity
+        starts = np.frombuffer(self.starts, dtype=np.int64)[order]
+        durations = np.frombuffer(self.durations, dtype=np.int64).reshape(self.capacity, len(PHASES))[order]
+        totals = np.frombuffer(self.totals, dtype=np.int64)[order]
+        scenes = np.frombuffer(self.scenes, dtype=np.uint8)[order]
+        return starts, durations, totals, scenes
+
+    def get_stats(self):
+        """returns {scene: {"frames", "p50_ms", "p99_ms", "max_ms", "<phase>_ms"...}} for every scene seen.
+
+        p50/p99/max are frame times, the phase values are mean times per frame.
+        """
+        starts, durations, totals, scenes = self.get_frames()
+        stats = {}
+        for scene_id, scene in enumerate(SCENES):
+            selected = scenes == scene_id
+            if not selected.any():
+                continue
+            frame_ms = totals[selected] / 1e6
+            scene_stats = {
+                "frames": int(selected.sum()),
+                "p50_ms": float(np.percentile(frame_ms, 50)),
+                "p99_ms": float(np.percentile(frame_ms, 99)),
+                "max_ms": float(frame_ms.max()),
+            }
+            for phase, phase_ms in zip(PHASES, durations[selected].mean(axis=0) / 1e6):
+                scene_stats[f"{phase}_ms"] = float(phase_ms)
+            stats[scene] = scene_stats
+        return stats
+
+    def report(self):
+        """returns the stats as a text table"""
+        columns = ["frames", "p50_ms", "p99_ms", "max_ms"] + [f"{phase}_ms" for phase in PHASES]
+        lines = ["scene     " + "".join(f"{column:>16}" for column in columns)]
+        for scene, scene_stats in self.get_stats().items():
+            lines.append(f"{scene:<10}" + f"{scene_stats['frames']:>16}"
+                         + "".join(f"{scene_stats[column]:>16.3f}" for column in columns[1:]))
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """writes the frames as trace events (chrome://tracing, Perfetto)"""
+        starts, durations, totals, scenes = self.get_frames()
+        origin = int(starts[0]) if len(starts) else 0
+        events = []
+        for start, phase_durations, total, scene_id in zip(starts.tolist(), durations.tolist(), totals.tolist(), scenes.tolist()):
+            timestamp = (start - origin) / 1000
+            events.append({"name": "frame", "ph": "X", "ts": timestamp, "dur": total / 1000,
+                           "pid": 0, "tid": 0, "args": {"scene": SCENES[scene_id]}})
+            # phases run back to back, in order
+            for phase, duration in zip(PHASES, phase_durations):
+                if duration:
+                    events.append({"name": phase, "ph": "X", "ts": timestamp, "dur": duration / 1000, "pid": 0, "tid": 0})
+                    timestamp += duration / 1000
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+    def export_csv(self, path):
+        """writes one line per frame, times in nanoseconds"""
+        starts, durations, totals, scenes = self.get_frames()
+        with open(path, "w") as csv_file:
+            csv_file.write(",".join(["start_ns", "scene", "frame_ns"] + [f"{phase}_ns" for phase in PHASES]) + "\n")
+            for start, phase_durations, total, scene_id in zip(starts.tolist(), durations.tolist(), totals.tolist(), scenes.tolist()):
+                csv_file.write(",".join(map(str, [start, SCENES[scene_id], total] + phase_durations)) + "\n")
+
+    def export(self, path):
+        """writes a csv file for a .csv path, a chrome trace otherwise"""
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_chrome_trace(path)
+
+
+# the game's profiler, disabled until enabled
+profiler = FrameProfiler()
@@ -1,6 +1,19 @@
 # game_state_manager.py
 import pygame
-from graphics import draw_background, draw_center_area, LIGHT_BLUE2_HEIGHT
+from asset_bundle import load_image
+from graphics import draw_background, draw_center_area, get_center_area, LIGHT_BLUE2_HEIGHT
+
+# level art, drawn over the center area (keyed by the lowercase state name)
+LEVEL_IMAGES = {
+    "forest1": "assets/images/forest/forest1.png",
+    "forest2": "assets/images/forest/forest2.png",
+    "forest3": "assets/images/forest/forest3.png",
+    "forest4": "assets/images/forest/forest4.png",
+    "forest5": "assets/images/forest/forest5.png",
+    "building": "assets/images/building/building.png",
+    "house": "assets/images/house/house.png",
+    "pit": "assets/images/pit/pit.png",
+}
 
 class GameStateManager:
     def __init__(self, screen, screen_width, screen_height):
@@ -10,31 +23,35 @@ class GameStateManager:
         self.current_state = "TITLE"
         self.previous_state = None
         
-        # load images
-        self.images = self._load_images()
+        # load images (nothing to draw when running headless without a screen)
+        self.images = self._load_images() if screen is not None else {}
+        
+        # static screen layers composed once per state (see get_backdrop)
+        self.backdrops = {}
         
         # game flags
         self.intro_sequence_active = False
         self.game_over = False
         self.music_playing = False
+    
+    def reset(self):
+        """returns to the title screen with all flags cleared"""
+        self.current_state = "TITLE"
+        self.previous_state = None
+        self.intro_sequence_active = False
+        self.game_over = False
+        self.music_playing = False
         
     def _load_images(self):
         # loads all images
         return {
             # title screen images
-            "et_head_title": pygame.image.load("assets/images/title/et_head_title.png"),
-            "et_title": pygame.image.load("assets/images/title/et_title.png"),
-            "copyright_title": pygame.image.load("assets/images/title/copyright_atari.png"),
+            "et_head_title": load_image("assets/images/title/et_head_title.png"),
+            "et_title": load_image("assets/images/title/et_title.png"),
+            "copyright_title": load_image("assets/images/title/copyright_atari.png"),
             
             # game screen images
-            "forest1": pygame.image.load("assets/images/forest/forest1.png"),
-            "forest2": pygame.image.load("assets/images/forest/forest2.png"),
-            "forest3": pygame.image.load("assets/images/forest/forest3.png"),
-            "forest4": pygame.image.load("assets/images/forest/forest4.png"),
-            "forest5": pygame.image.load("assets/images/forest/forest5.png"),
-            "building": pygame.image.load("assets/images/building/building.png"),
-            "house": pygame.image.load("assets/images/house/house.png"),
-            "pit": pygame.image.load("assets/images/pit/pit.png"),
+            **{image_key: load_image(path) for image_key, path in LEVEL_IMAGES.items()},
         }
     
     def change_state(self, new_state, **kwargs):
@@ -52,7 +69,7 @@ class GameStateManager:
             # Configuration spécifique pour le pit
             et = kwargs.get('et')
             if et:
-                center_x, center_y, center_width, center_height = draw_center_area(self.screen, self.screen_width, "PIT")
+                center_x, center_y, center_width, center_height = get_center_area(self.screen_width, "PIT")
                 et.setup_pit_fall(center_x, center_y, center_width, center_height)
     
     def get_current_state(self):
@@ -70,41 +87,52 @@ class GameStateManager:
     def set_game_over(self, game_over):
         self.game_over = game_over
     
-    def render_title_screen(self):
-        """rendering game screens"""
-        draw_background(self.screen, self.screen_width, self.screen_height, "TITLE")
-        center_x, center_y, center_width, center_height = draw_center_area(self.screen, self.screen_width, "TITLE")
+    def _draw_title_screen(self, surface):
+        draw_background(surface, self.screen_width, self.screen_height, "TITLE")
+        center_x, center_y, center_width, center_height = draw_center_area(surface, self.screen_width, "TITLE")
         
         # draw E.T. title logo
         et_title_rect = self.images["et_title"].get_rect(midtop=(
             center_x + center_width // 2 - 15,
             center_y + 53
         ))
-        self.screen.blit(self.images["et_title"], et_title_rect)
+        surface.blit(self.images["et_title"], et_title_rect)
         
         # draw E.T. head image
         et_head_title_rect = self.images["et_head_title"].get_rect(midbottom=(
             center_x + center_width // 2 - 4,
             center_y + center_height - 63
         ))
-        self.screen.blit(self.images["et_head_title"], et_head_title_rect)
+        surface.blit(self.images["et_head_title"], et_head_title_rect)
         
         # draw copyright notice
         copyright_rect = self.images["copyright_title"].get_rect(
             center=(self.screen_width // 2, self.screen_height - LIGHT_BLUE2_HEIGHT // 2)
         )
-        self.screen.blit(self.images["copyright_title"], copyright_rect)
+        surface.blit(self.images["copyright_title"], copyright_rect)
     
-    def render_game_screen(self, state, et, spaceship=None):
-        """rendering game screens"""
+    def _draw_game_screen(self, surface, state):
         # special case for pit: use title background to get black borders
         background_state = "TITLE" if state == "PIT" else state
-        draw_background(self.screen, self.screen_width, self.screen_height, background_state)
-        center_x, center_y, center_width, center_height = draw_center_area(self.screen, self.screen_width, state)
+        draw_background(surface, self.screen_width, self.screen_height, background_state)
+        center_x, center_y, center_width, center_height = draw_center_area(surface, self.screen_width, state)
         
         # show level specific image
         image_key = state.lower()  # convert FOREST1 to forest1, etc.
         if image_key in self.images:
-            self.screen.blit(self.images[image_key], (center_x, center_y))
+            surface.blit(self.images[image_key], (center_x, center_y))
         
-        return center_x, center_y, center_width, center_height
\ No newline at end of file
+        return center_x, center_y, center_width, center_height
+    
+    def get_backdrop(self, state):
+        """returns the static layers of a screen (bars, center area, level art), composed once"""
+        backdrop = self.backdrops.get(state)
+        if backdrop is None:
+            # same pixel format as the screen so restoring from it is a plain copy
+            backdrop = pygame.Surface(self.screen.get_size(), 0, self.screen)
+            if state == "TITLE":
+                self._draw_title_screen(backdrop)
+            else:
+                self._draw_game_screen(backdrop, state)
+            self.backdrops[state] = backdrop
+        return backdrop
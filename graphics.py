@@ -14,6 +14,10 @@ LIGHT_GREEN = (71, 115, 35)
 BLACK = (0, 0, 0)
 GREY = (170, 170, 170)
 
+# window size
+SCREEN_WIDTH = 960
+SCREEN_HEIGHT = 566
+
 # rect heights
 PURPLE_HEIGHT = 47
 LIGHT_BLUE2_HEIGHT = 62
@@ -56,8 +60,8 @@ def draw_background(screen, screen_width, screen_height, state):
     # draw black bar above the light blue
     pygame.draw.rect(screen, BLACK, (0, screen_height - LIGHT_BLUE2_HEIGHT - bottom_black, screen_width, bottom_black))
 
-# draw the main play area
-def draw_center_area(screen, screen_width, state):
+# compute the main play area without drawing it
+def get_center_area(screen_width, state):
     # compute horizontal and vertical position of the center area based on state
     center_x = (screen_width - CENTER_WIDTH) // 2
 
@@ -71,6 +75,12 @@ def draw_center_area(screen, screen_width, state):
 
     center_y = PURPLE_HEIGHT + top_black + vertical_offset
 
+    return (center_x, center_y, CENTER_WIDTH, CENTER_HEIGHT)
+
+# draw the main play area
+def draw_center_area(screen, screen_width, state):
+    center_x, center_y, center_width, center_height = get_center_area(screen_width, state)
+
     # choose color depending on the state
     if state == "TITLE":
         color = BLUE
@@ -94,6 +104,6 @@ def draw_center_area(screen, screen_width, state):
         color = LIGHT_GREEN  # default color
 
     # draw the rectangle with the selected color
-    pygame.draw.rect(screen, color, (center_x, center_y, CENTER_WIDTH, CENTER_HEIGHT))
+    pygame.draw.rect(screen, color, (center_x, center_y, center_width, center_height))
 
-    return (center_x, center_y, CENTER_WIDTH, CENTER_HEIGHT)
\ No newline at end of file
+    return (center_x, center_y, center_width, center_height)
\ No newline at end of file
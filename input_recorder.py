@@ -0,0 +1,100 @@
+# input_recorder.py
+#
+# records the input bitmask of every frame (see controls.py) and replays it headless:
+#
+#     python main.py --record session.etrec
+#     python input_recorder.py session.etrec
+#
+# the game is deterministic, so a recording plus its starting state reproduces a session.
+import struct
+import sys
+import time
+import zlib
+
+RECORDING_MAGIC = b"ETREC"
+RECORDING_VERSION = 1
+
+# where the recording starts
+START_TITLE = 0       # game launch, on the title screen
+START_NEW_GAME = 1    # Simulation.reset(): spaceship intro of a new game
+START_PLAYING = 2     # Simulation.reset(skip_intro=True): e.t. just became controllable
+
+# header: magic, version, start mode, frame count, compressed input length
+_HEADER = struct.Struct("<5sBBII")
+
+
+class InputRecording:
+    """a starting state and one input bitmask per frame"""
+
+    def __init__(self, start_mode=START_TITLE, frames=b""):
+        self.start_mode = start_mode
+        self.frames = bytearray(frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def record(self, input_bits):
+        """appends one frame of input"""
+        self.frames.append(input_bits)
+
+    def save(self, path):
+        """writes the recording (inputs are zlib compressed, held keys repeat a lot)"""
+        data = zlib.compress(bytes(self.frames), 9)
+        with open(path, "wb") as recording_file:
+            recording_file.write(_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.start_mode, len(self.frames), len(data)))
+            recording_file.write(data)
+
+    @classmethod
+    def load(cls, path):
+        """reads a recording written by save()"""
+        with open(path, "rb") as recording_file:
+            header = recording_file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path}: not an input recording")
+            magic, version, start_mode, frame_count, data_length = _HEADER.unpack(header)
+            if magic != RECORDING_MAGIC:
+                raise ValueError(f"{path}: not an input recording")
+            if version != RECORDING_VERSION:
+                raise ValueError(f"{path}: unsupported recording version {version}")
+            frames = zlib.decompress(recording_file.read(data_length))
+        if len(frames) != frame_count:
+            raise ValueError(f"{path}: truncated recording")
+        return cls(start_mode, frames)
+
+    def start(self, simulation):
+        """puts a simulation in the starting state of the recording"""
+        if self.start_mode == START_NEW_GAME:
+            simulation.reset()
+        elif self.start_mode == START_PLAYING:
+            simulation.reset(skip_intro=True)
+
+
+def replay(recording, simulation=None):
+    """feeds a recording to a simulation (a new headless one by default), as fast as possible.
+
+    returns the simulation in its final state.
+    """
+    if simulation is None:
+        from simulation import Simulation
+        simulation = Simulation()
+    recording.start(simulation)
+    step = simulation.step
+    for input_bits in recording.frames:
+        step(input_bits)
+    return simulation
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python input_recorder.py RECORDING")
+        sys.exit(2)
+
+    recording = InputRecording.load(sys.argv[1])
+    start_time = time.perf_counter()
+    simulation = replay(recording)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{len(recording)} frames ({len(recording) / 60:.1f}s of play) replayed in {elapsed:.3f}s")
+    print(f"screen: {simulation.game_state_manager.get_current_state()}, "
+          f"counter: {simulation.counter.value}, "
+          f"game over: {simulation.game_state_manager.is_game_over()}")
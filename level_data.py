@@ -0,0 +1,93 @@
+# level_data.py
+#
+# the game map is defined in assets/levels.json:
+#
+#     {"levels": {"FOREST1": {"connections": {"right": "FOREST5", ...},
+#                             "has_pit": false,
+#                             "pit_positions": [[x, y, width, height], ...],
+#                             "items": [], "enemies": []}, ...}}
+#
+# pit positions are relative to the play area. connections lead to another level or to
+# null; the PIT level has an "escape" connection. load_level_table compiles the file into
+# integer level ids and arrays, once per file version.
+import os
+import json
+import numpy as np
+from collision_grid import PitGrid, PitMasks
+
+LEVELS_PATH = "assets/levels.json"
+
+# connection directions, in the order of the adjacency columns
+DIRECTIONS = ("right", "left", "up", "down", "escape")
+DIRECTION_IDS = {direction: direction_id for direction_id, direction in enumerate(DIRECTIONS)}
+NO_LEVEL = -1  # adjacency entry of a direction that leads nowhere
+
+# compiled tables, keyed by (path, modification time)
+_table_cache = {}
+
+
+class LevelTable:
+    """level definitions compiled for fast lookups.
+
+    levels are numbered in file order. `connections` is the [level, direction] adjacency
+    array (NO_LEVEL where there is no connection), `adjacency` the same as nested tuples
+    for scalar code. pit rects are stored flat: the pits of level i are
+    pit_rects[pit_offsets[i]:pit_offsets[i + 1]].
+    """
+
+    def __init__(self, levels):
+        # levels: name -> level definition, as in the data file
+        self.levels = levels
+        self.names = tuple(levels)
+        self.ids = {name: level_id for level_id, name in enumerate(self.names)}
+
+        self.connections = np.full((len(self.names), len(DIRECTIONS)), NO_LEVEL, dtype=np.int16)
+        for level_id, name in enumerate(self.names):
+            for direction, target in levels[name]["connections"].items():
+                if target is not None:
+                    self.connections[level_id, DIRECTION_IDS[direction]] = self.ids[target]
+        self.adjacency = tuple(tuple(row) for row in self.connections.tolist())
+
+        # pits, flat and per level
+        self.level_pit_rects = tuple(tuple(tuple(rect) for rect in levels[name]["pit_positions"]) for name in self.names)
+        pit_counts = [len(rects) for rects in self.level_pit_rects]
+        self.pit_offsets = np.zeros(len(self.names) + 1, dtype=np.int32)
+        self.pit_offsets[1:] = np.cumsum(pit_counts)
+        self.pit_rects = np.array([rect for rects in self.level_pit_rects for rect in rects], dtype=np.int32).reshape(-1, 4)
+        self.pit_grids = tuple(PitGrid.for_rects(rects) for rects in self.level_pit_rects)
+
+        self.has_pit = tuple(bool(levels[name]["has_pit"]) for name in self.names)
+        self.items = tuple(levels[name]["items"] for name in self.names)
+        self.enemies = tuple(levels[name]["enemies"] for name in self.names)
+        # pixel pit masks, built from the level art when first asked for
+        self.pit_masks = None
+
+    def get_pit_masks(self):
+        """returns the PitMasks of each level (None for levels without pits), from the level art"""
+        if self.pit_masks is None:
+            from asset_bundle import load_image
+            from game_state_manager import LEVEL_IMAGES
+            self.pit_masks = tuple(PitMasks(load_image(LEVEL_IMAGES[name.lower()]), rects) if rects else None
+                                   for name, rects in zip(self.names, self.level_pit_rects))
+        return self.pit_masks
+
+    def get_padded_pit_rects(self):
+        """returns the pit rects as a [level, pit, 4] array, padded with rects far outside
+        the play area (they never overlap anything) up to the largest pit count"""
+        max_pits = max(1, max(len(rects) for rects in self.level_pit_rects))
+        padded = np.full((len(self.names), max_pits, 4), 1 << 20, dtype=np.int32)
+        padded[:, :, 2:] = 0
+        for level_id, rects in enumerate(self.level_pit_rects):
+            if rects:
+                padded[level_id, :len(rects)] = rects
+        return padded
+
+
+def load_level_table(path=LEVELS_PATH):
+    """returns the compiled level table of a level file, compiled again only when the file changes"""
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    table = _table_cache.get(key)
+    if table is None:
+        with open(path) as level_file:
+            table = _table_cache[key] = LevelTable(json.load(level_file)["levels"])
+    return table
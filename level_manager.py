@@ -1,183 +1,89 @@
 # level_manager.py
+from math import floor
 import pygame
+from level_data import load_level_table, DIRECTION_IDS, NO_LEVEL
 
 class LevelManager:
-    def __init__(self):
-        # game map definition based on the provided image and Atari testing
-        self.level_map = {
-            "FOREST1": {  # center of the map
-                "connections": {
-                    "right": "FOREST5",
-                    "left": "FOREST3",
-                    "up": "FOREST4",
-                    "down": "FOREST2"
-                },
-                "has_pit": False,
-                "pit_positions": [],
-                "items": [],
-                "enemies": []
-            },
-            "FOREST2": {
-                "connections": {
-                    "right": "FOREST5",
-                    "left": "FOREST3", 
-                    "up": "FOREST1",
-                    "down": "BUILDING"
-                },
-                "has_pit": True,
-                "pit_positions": [
-                                    (96, 107, 192, 70), # x, y, w, h
-                                    (480, 107, 192, 70),
-                                    (96, 278, 168, 31),
-                                    (504, 278, 168, 31)
-                                 ],
-                "items": [],
-                "enemies": []
-            },
-            "FOREST3": {
-                "connections": {
-                    "right": "FOREST2",
-                    "left": "FOREST4",
-                    "up": "FOREST1",
-                    "down": "BUILDING"
-                },
-                "has_pit": True,
-                "pit_positions": [
-                                    (72, 76, 240, 63), # x, y, w, h
-                                    (456, 76, 240, 63),
-                                    (72, 278, 240, 63),
-                                    (456, 278, 240, 63)
-                                 ],
-                "items": [],
-                "enemies": []
-            },
-            "FOREST4": {
-                "connections": {
-                    "right": "FOREST3",
-                    "left": "FOREST5",
-                    "up": "FOREST1",
-                    "down": "BUILDING"
-                },
-                "has_pit": True,
-                "pit_positions": [
-                                    (96, 88, 120, 240), # x, y, w, h
-                                    (552, 88, 120, 240),
-                                    (312, 107, 144, 44),
-                                    (312, 265, 144, 44)
-                                 ],
-                "items": [],
-                "enemies": []
-            },
-            "FOREST5": {
-                "connections": {
-                    "right": "FOREST4",
-                    "left": "FOREST2",
-                    "up": "FOREST1",
-                    "down": "BUILDING"
-                },
-                "has_pit": True,
-                "pit_positions": [
-                                    (0, 57, 120, 44), # x, y, w, h
-                                    (264, 57, 240, 44),
-                                    (648, 57, 120, 44),
-                                    (96, 183, 192, 50),
-                                    (480, 183, 192, 50),
-                                    (0, 315, 120, 45),
-                                    (264, 315, 240, 45),
-                                    (648, 315, 120, 45)
-                                 ],
-                "items": [],
-                "enemies": []
-            },
-            "BUILDING": {
-                "connections": {
-                    "right": "FOREST3",
-                    "left": "FOREST5",
-                    "up": "FOREST4",
-                    "down": "FOREST2"
-                },
-                "has_pit": False,
-                "pit_positions": [],
-                "items": [],
-                "enemies": []
-            },
-            "HOUSE": {
-                "connections": {
-                    "right": None,
-                    "left": None,
-                    "up": "FOREST5",
-                    "down": None
-                },
-                "has_pit": False,
-                "pit_positions": [],
-                "items": [],
-                "enemies": []
-            },
-            "PIT": {
-                "connections": {
-                    "escape": "FOREST2"  # when e.t. escapes from the pit
-                },
-                "has_pit": False,
-                "pit_positions": [],
-                "items": [],
-                "enemies": []
-            }
-        }
+    def __init__(self, level_table=None, pixel_collisions=False):
+        # game map definition based on the provided image and Atari testing (see assets/levels.json),
+        # compiled once and shared by every level manager
+        self.table = level_table if level_table is not None else load_level_table()
+        # with pixel collisions, pits are the pit pixels of the level art (see PitMasks)
+        self.pit_masks = self.table.get_pit_masks() if pixel_collisions else None
         
         self.current_level = "FOREST1"
+        self.current_level_id = self.table.ids[self.current_level]
         # track which level ET fell from to return there
         self.pit_escape_level = None
         # track which pit ET fell into
         self.current_pit_bounds = None
     
-    def get_current_level_data(self):
-        """returns the current level data"""
-        return self.level_map.get(self.current_level, {})
+    def reset(self):
+        """returns to the first level and forgets the last pit"""
+        self.set_level("FOREST1")
+        self.pit_escape_level = None
+        self.current_pit_bounds = None
     
     def can_move_to(self, direction):
         """checks if we can move in a direction"""
-        level_data = self.get_current_level_data()
-        connections = level_data.get("connections", {})
-        return connections.get(direction) is not None
+        return self.get_next_level_id(direction) != NO_LEVEL
+    
+    def get_next_level_id(self, direction):
+        """returns the id of the next level in a direction (NO_LEVEL if there is none)"""
+        direction_id = DIRECTION_IDS.get(direction)
+        if direction_id is None:
+            return NO_LEVEL
+        return self.table.adjacency[self.current_level_id][direction_id]
     
     def get_next_level(self, direction):
         """returns the next level in a direction"""
-        level_data = self.get_current_level_data()
-        connections = level_data.get("connections", {})
-        return connections.get(direction)
+        next_level_id = self.get_next_level_id(direction)
+        if next_level_id == NO_LEVEL:
+            return None
+        return self.table.names[next_level_id]
     
     def change_level(self, direction):
         """changes level in a direction"""
-        next_level = self.get_next_level(direction)
-        if next_level:
-            self.current_level = next_level
+        next_level_id = self.get_next_level_id(direction)
+        if next_level_id != NO_LEVEL:
+            self.current_level_id = next_level_id
+            self.current_level = self.table.names[next_level_id]
             return True
         return False
     
     def set_level(self, level_name):
         """forces change to a specific level"""
-        if level_name in self.level_map:
+        level_id = self.table.ids.get(level_name)
+        if level_id is not None:
             self.current_level = level_name
+            self.current_level_id = level_id
             return True
         return False
     
     def get_current_level(self):
         return self.current_level
     
-    def has_pit_at_position(self, x, y, et_width, et_height):
-        level_data = self.get_current_level_data()
-        pit_positions = level_data.get("pit_positions", [])
-        
-        for pit_x, pit_y, pit_width, pit_height in pit_positions:
-            if (x < pit_x + pit_width and 
-                x + et_width > pit_x and 
-                y < pit_y + pit_height and 
-                y + et_height > pit_y):
-                # store the exact pit that was touched
-                self.pit_escape_level = self.current_level
-                self.current_pit_bounds = (pit_x, pit_y, pit_width, pit_height)
-                return True
-        return False
+    def has_pit_at_position(self, x, y, et_width, et_height, mask=None):
+        # with a mask and pixel collisions, the pixels of the mask drawn at (x, y) are tested instead of the rect
+        if mask is not None and self.pit_masks is not None:
+            pit_masks = self.pit_masks[self.current_level_id]
+            pit_bounds = pit_masks.find_pit(mask, floor(x), floor(y)) if pit_masks is not None else None
+        else:
+            pit_bounds = self.table.pit_grids[self.current_level_id].find_pit(x, y, et_width, et_height)
+        if pit_bounds is None:
+            return False
+        # store the exact pit that was touched
+        self.pit_escape_level = self.current_level
+        self.current_pit_bounds = pit_bounds
+        return True
+
+    def touches_current_pit(self, mask, x, y):
+        """checks if a mask drawn at (x, y) covers a pixel of the pit ET fell into (pixel collisions)"""
+        if not self.current_pit_bounds or self.current_level != self.pit_escape_level:
+            # no pit, or e.t. walked off the screen of his pit before he was clear of it
+            return False
+        pit_masks = self.pit_masks[self.current_level_id]
+        return pit_masks.touches_pit(tuple(self.current_pit_bounds), mask, floor(x), floor(y))
 
     def get_pit_center_position(self, center_x, center_y, et_width, et_height):
         """returns the center position of the pit ET fell into"""
@@ -226,19 +132,3 @@ class LevelManager:
     def get_pit_escape_level(self):
         """returns the level to escape to from pit"""
         return self.pit_escape_level
-    
-    def is_outside_pit(self, et_x, et_y, et_width, et_height, center_x, center_y):
-        """checks if ET is outside the current pit bounds"""
-        if not self.current_pit_bounds:
-            return True
-        
-        pit_x, pit_y, pit_width, pit_height = self.current_pit_bounds
-        # adjust pit coordinates relative to center
-        abs_pit_x = center_x + pit_x
-        abs_pit_y = center_y + pit_y
-        
-        # check if ET is completely outside pit bounds
-        return (et_x + et_width <= abs_pit_x or 
-                et_x >= abs_pit_x + pit_width or
-                et_y + et_height <= abs_pit_y or
-                et_y >= abs_pit_y + pit_height)
\ No newline at end of file
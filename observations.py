@@ -0,0 +1,173 @@
+# observations.py
+#
+# the screen as numpy arrays for ML and analytics consumers, without copying full frames:
+#
+#     observer = FrameObserver(screen)
+#     with observer.pixels() as pixels:       # (566, 960, 3) view of the screen itself
+#         ...
+#     frame = observer.get_atari_frame()      # (210, 160, 3) uint8, the atari grid
+#     indices = observer.get_palette_frame()  # (210, 160) uint8 palette indices
+#
+# pygame locks a surface while a view of its pixels exists, and a locked surface cannot be
+# blitted to: drop views (and names bound to them) before the next frame is rendered.
+# the atari grid is sampled (nearest pixel), not averaged: one fancy index into the
+# screen's pixel view copies only the 160 x 210 sampled pixels.
+from contextlib import contextmanager
+import numpy as np
+import pygame
+from graphics import (PURPLE, PURPLE_HOUSE, BLUE, LIGHT_BLUE, LIGHT_BLUE2, BROWN, YELLOW,
+                      DARK_GREEN, LIGHT_GREEN, BLACK, GREY)
+
+ATARI_WIDTH = 160
+ATARI_HEIGHTS = (192, 210)  # visible lines of an NTSC picture, and the usual emulator frame
+DEFAULT_ATARI_HEIGHT = 210
+MAX_COLORS = 256
+
+# the first palette entries, so the game's flat colors always get the same index
+BASE_COLORS = (BLACK, PURPLE, PURPLE_HOUSE, BLUE, LIGHT_BLUE, LIGHT_BLUE2, BROWN, YELLOW,
+               DARK_GREEN, LIGHT_GREEN, GREY)
+
+_RGB_MASK = np.uint32(0xFFFFFF)
+_SLOT_BITS = 16
+_EMPTY_SLOT = np.uint32(0xFFFFFFFF)  # not a 0xRRGGBB key
+
+
+def pack_colors(rgb):
+    """returns (..., 3) colors as uint32 0xRRGGBB keys"""
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def get_sample_indices(size, grid_size):
+    """returns the pixel index sampled for each of grid_size cells across size pixels (cell centers)"""
+    return ((np.arange(grid_size) + 0.5) * size / grid_size).astype(np.intp)
+
+
+def _get_slots(keys):
+    # multiplicative (fibonacci) hash of uint32 keys to _SLOT_BITS bits
+    return (keys * np.uint32(0x9E3779B1)) >> np.uint32(32 - _SLOT_BITS)
+
+
+class Palette:
+    """up to 256 colors and their uint8 indices, the given colors first, then in the order
+    they are first seen. save `colors` and pass it back to keep the same indices across runs."""
+
+    def __init__(self, colors=BASE_COLORS):
+        self.colors = []
+        self._index_of = {}  # key: palette index
+        # hash table of the keys, one color per slot: a pixel is looked up with a multiply
+        # and two gathers, colors that collide with the slot's color take the slow path
+        self._slot_keys = np.full(1 << _SLOT_BITS, _EMPTY_SLOT, dtype=np.uint32)
+        self._slot_indices = np.zeros(1 << _SLOT_BITS, dtype=np.uint8)
+        self.add(colors)
+
+    def __len__(self):
+        return len(self.colors)
+
+    def _add_key(self, key):
+        # returns the index of a 0xRRGGBB key, adding it if it is new
+        index = self._index_of.get(key)
+        if index is None:
+            index = len(self.colors)
+            if index == MAX_COLORS:
+                raise ValueError(f"palette is full ({MAX_COLORS} colors)")
+            self.colors.append((key >> 16, (key >> 8) & 255, key & 255))
+            self._index_of[key] = index
+            slot = _get_slots(np.array(key, dtype=np.uint32)).item()
+            if self._slot_keys[slot] == _EMPTY_SLOT:
+                self._slot_keys[slot] = key
+                self._slot_indices[slot] = index
+        return index
+
+    def add(self, colors):
+        """appends the colors that are not in the palette yet"""
+        colors = np.array([tuple(color)[:3] for color in colors], dtype=np.uint32).reshape(-1, 3)
+        for key in pack_colors(colors).tolist():
+            self._add_key(key)
+
+    def get_indices(self, keys, out=None):
+        """returns the palette index of every 0xRRGGBB key (see pack_colors), adding new colors"""
+        slots = _get_slots(keys)
+        indices = np.take(self._slot_indices, slots, out=out)
+        missing = self._slot_keys[slots] != keys
+        if missing.any():
+            missing_keys, inverse = np.unique(keys[missing], return_inverse=True)
+            missing_indices = np.array([self._add_key(key) for key in missing_keys.tolist()], dtype=np.uint8)
+            indices[missing] = missing_indices[inverse]
+        return indices
+
+    def to_rgb(self, indices):
+        """returns the colors of palette indices, as an (..., 3) uint8 array"""
+        return np.array(self.colors, dtype=np.uint8)[indices]
+
+
+class FrameObserver:
+    """numpy observations of a surface (the game screen).
+
+    get_atari_frame() and get_palette_frame() return arrays owned by the observer, which
+    the next call overwrites: copy them to keep them.
+    """
+
+    def __init__(self, surface, atari_height=DEFAULT_ATARI_HEIGHT, palette=None):
+        self.surface = surface
+        self.palette = palette if palette is not None else Palette()
+        self.atari_height = atari_height
+        width, height = surface.get_size()
+
+        # sampled columns are a slice when the width is a multiple of the atari width (960 = 6 * 160)
+        step, remainder = divmod(width, ATARI_WIDTH)
+        columns = slice(step // 2, width, step) if remainder == 0 else get_sample_indices(width, ATARI_WIDTH)[:, None]
+        self._sample_index = (columns, get_sample_indices(height, atari_height))
+
+        # 32 bit surfaces are sampled as mapped pixels, then split into channels
+        self._shifts = surface.get_shifts()[:3] if surface.get_bytesize() == 4 else None
+        self._atari_frame = np.empty((atari_height, ATARI_WIDTH, 3), dtype=np.uint8)
+        self._palette_frame = np.empty((atari_height, ATARI_WIDTH), dtype=np.uint8)
+
+    @contextmanager
+    def pixels(self):
+        """a (height, width, 3) uint8 view of the surface's pixels, valid in the with block.
+
+        writes to the view draw on the surface. the surface is locked until the view is gone.
+        """
+        view = pygame.surfarray.pixels3d(self.surface)
+        try:
+            yield view.transpose(1, 0, 2)
+        finally:
+            del view
+
+    def _sample_keys(self):
+        # the atari grid as (atari_height, 160) 0xRRGGBB keys
+        if self._shifts is None:
+            return pack_colors(self.get_atari_frame())
+        view = pygame.surfarray.pixels2d(self.surface)
+        sample = view[self._sample_index].T
+        del view
+        if self._shifts == (16, 8, 0):
+            return sample & _RGB_MASK
+        red_shift, green_shift, blue_shift = self._shifts
+        return (((sample >> red_shift) & 255) << 16) | (((sample >> green_shift) & 255) << 8) | ((sample >> blue_shift) & 255)
+
+    def get_atari_frame(self):
+        """returns the screen sampled down to the atari grid, as (atari_height, 160, 3) uint8"""
+        frame = self._atari_frame
+        if self._shifts is None:
+            view = pygame.surfarray.pixels3d(self.surface)
+            frame[...] = view[self._sample_index].transpose(1, 0, 2)
+            del view
+            return frame
+        view = pygame.surfarray.pixels2d(self.surface)
+        sample = view[self._sample_index].T
+        del view
+        for channel, shift in enumerate(self._shifts):
+            frame[..., channel] = sample >> shift
+        return frame
+
+    def get_palette_frame(self, full_size=False):
+        """returns the palette index of every pixel of the atari grid, as (atari_height, 160)
+        uint8 (or of the whole screen with full_size, as a new (height, width) array)"""
+        if full_size:
+            with self.pixels() as pixels:
+                keys = pack_colors(pixels)
+            return self.palette.get_indices(keys)
+        return self.palette.get_indices(self._sample_keys(), out=self._palette_frame)
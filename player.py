@@ -1,29 +1,91 @@
 # player.py
+from enum import IntEnum
 import pygame
+from asset_bundle import load_image
+from sprite_atlas import SpriteAtlas, FACING_LEFT, FACING_RIGHT
+
+
+class ETState(IntEnum):
+    """e.t.'s states, one handle_input handler each (ET._state_handlers)"""
+    INTRO = 0                          # not controllable yet (in or below the spaceship)
+    FINISHING_HEAD_RAISE = 1           # head lowering (frames 4 to 6) once clear of the pit
+    HEAD_RAISE = 2                     # standing head raise, outside the pit
+    FALLING = 3                        # falling into the pit
+    LEVITATING = 4                     # rising in the pit, head locked on frame 3
+    PIT = 5                            # walking at the bottom of the pit
+    ESCAPED_PIT_MOVING = 6             # out of the pit, head still locked until clear of it
+    WALKING = 7
+    FALLING_HEAD_RAISE = 8             # head raise during the fall, levitates at frame 3
+    PIT_HEAD_RAISE = 9                 # head raise at the bottom of the pit, levitates at frame 3
+    PIT_FINISHING_HEAD_RAISE = 10      # head lowering after a levitation back to the bottom of the pit
+    FALLING_FINISHING_HEAD_RAISE = 11  # head lowering, then the fall into a pit stepped on meanwhile
+
+
+# the states as module constants, for the per-frame code (an enum member lookup costs
+# several times a global one)
+STATE_INTRO = ETState.INTRO
+STATE_FINISHING_HEAD_RAISE = ETState.FINISHING_HEAD_RAISE
+STATE_HEAD_RAISE = ETState.HEAD_RAISE
+STATE_FALLING = ETState.FALLING
+STATE_LEVITATING = ETState.LEVITATING
+STATE_PIT = ETState.PIT
+STATE_ESCAPED_PIT_MOVING = ETState.ESCAPED_PIT_MOVING
+STATE_WALKING = ETState.WALKING
+STATE_FALLING_HEAD_RAISE = ETState.FALLING_HEAD_RAISE
+STATE_PIT_HEAD_RAISE = ETState.PIT_HEAD_RAISE
+STATE_PIT_FINISHING_HEAD_RAISE = ETState.PIT_FINISHING_HEAD_RAISE
+STATE_FALLING_FINISHING_HEAD_RAISE = ETState.FALLING_FINISHING_HEAD_RAISE
+
+# the state each head lowering ends in
+FINISHED_HEAD_RAISE_STATES = {
+    STATE_FINISHING_HEAD_RAISE: STATE_WALKING,
+    STATE_PIT_FINISHING_HEAD_RAISE: STATE_PIT,
+    STATE_FALLING_FINISHING_HEAD_RAISE: STATE_FALLING,
+}
+
 
 class ET:
-    def __init__(self, x, y, walk_sound, run_sound, head_raise_sound):
+    __slots__ = (
+        "atlas", "images", "x", "y", "speed", "boost_speed",
+        "walk_frame", "walk_counter", "walk_anim_speed", "image", "movement_loop",
+        "moving", "is_running", "state",
+        "head_raise_frame", "head_raise_counter", "head_raise_sound", "head_raise_speed", "head_raise_just_started",
+        "pit_target_y", "pit_fall_speed", "pit_left_limit", "pit_right_limit", "pit_bottom_y",
+        "pit_escape_y", "head_locked_image", "levitation_speed",
+        "finish_frame", "finish_counter",
+        "levitation_sound_timer", "levitation_sound_delay", "levitation_sound",
+        "step_threshold",
+    )
+
+    def __init__(self, x, y, head_raise_sound):
         # load all sprite images for E.T.'s animations
-        self.images = {
+        sources = {
             # idle
-            "idle": pygame.image.load("assets/images/e.t/idle/et_idle.png"),
+            "idle": [load_image("assets/images/e.t/idle/et_idle.png")],
             # walk
             "walk": [
-                pygame.image.load("assets/images/e.t/walking/et_walking_0.png"),
-                pygame.image.load("assets/images/e.t/walking/et_walking_1.png"),
-                pygame.image.load("assets/images/e.t/walking/et_walking_2.png")
+                load_image("assets/images/e.t/walking/et_walking_0.png"),
+                load_image("assets/images/e.t/walking/et_walking_1.png"),
+                load_image("assets/images/e.t/walking/et_walking_2.png")
             ],
             # head raise
             "head_raise": [
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_0.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_1.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_2.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_3.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_4.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_5.png"),
-                pygame.image.load("assets/images/e.t/head_raising/et_head_raise_6.png")
+                load_image("assets/images/e.t/head_raising/et_head_raise_0.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_1.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_2.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_3.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_4.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_5.png"),
+                load_image("assets/images/e.t/head_raising/et_head_raise_6.png")
             ]
         }
+        # every frame in both facings, converted once, so animating never flips a surface
+        self.atlas = SpriteAtlas(sources)
+        self.images = {
+            "idle": self.atlas.get("idle"),
+            "walk": self.atlas.get_frames("walk"),
+            "head_raise": self.atlas.get_frames("head_raise")
+        }
         # initial position on screen
         self.x = x
         self.y = y
@@ -38,19 +100,18 @@ class ET:
         self.walk_anim_speed = 3
         self.image = self.images["idle"]
 
-        # sound effects
-        self.walk_sound = walk_sound
-        self.run_sound = run_sound
+        # looping movement sound that should be heard ("et_walk", "et_run" or None),
+        # played by the audio manager
+        self.movement_loop = None
 
         # movement state
         self.moving = False
         self.is_running = False
 
-        # visibility and playability control during the intro
-        self.is_controllable = False  # e.t. is not playable until the spaceship has disappeared.
+        # e.t. is not playable until the spaceship has disappeared
+        self.state = STATE_INTRO
 
         # head raising (used for levitation)
-        self.head_raise_active = False
         self.head_raise_frame = 0
         self.head_raise_counter = 0
         self.head_raise_sound = head_raise_sound
@@ -58,25 +119,18 @@ class ET:
         self.head_raise_just_started = False  # track when head raise starts
 
         # pit falling
-        self.is_falling_into_pit = False
         self.pit_target_y = 0
         self.pit_fall_speed = 6.65
-        self.in_pit = False
         self.pit_left_limit = 0
         self.pit_right_limit = 0
         self.pit_bottom_y = 0
 
         # pit escaping
-        self.rising_out_of_pit = False
         self.pit_escape_y = 0  # y limit to escape pit
         self.head_locked_image = self.images["head_raise"][3]  # frame used while rising
-        self.ready_to_levitate = False  # becomes true when head_raise_3 is reached
         self.levitation_speed = 2 # control how fast e.t. goes up/down during levitation
-        self.finishing_head_raise = False
         self.finish_frame = 4
         self.finish_counter = 0
-        self.escaped_pit_moving = False  # new state: out of pit but still in head_raise_3, needs to move away from pit collision
-
 
         # levitation sound management
         self.levitation_sound_timer = 0
@@ -84,13 +138,44 @@ class ET:
         self.levitation_sound = None  # will be set later
 
         # step tracking for counter
-        self.previous_x = x
-        self.previous_y = y
         self.step_threshold = 1.0  # minimum distance to count as a step
 
+    def reset_for_new_game(self, x, y):
+        """resets E.T. to his initial state for a new game (assets and sounds are kept)"""
+        self.x = x
+        self.y = y
+        self.walk_frame = 0
+        self.walk_counter = 0
+        self.walk_anim_speed = 3
+        self.image = self.images["idle"]
+        self.moving = False
+        self.is_running = False
+        self.movement_loop = None
+        self.state = STATE_INTRO
+
+        # head raising
+        self.head_raise_frame = 0
+        self.head_raise_counter = 0
+        self.head_raise_just_started = False
+
+        # pit falling
+        self.pit_target_y = 0
+        self.pit_left_limit = 0
+        self.pit_right_limit = 0
+        self.pit_bottom_y = 0
+
+        # pit escaping
+        self.pit_escape_y = 0
+        self.finish_frame = 4
+        self.finish_counter = 0
+        self.levitation_sound_timer = 0
+
     def set_controllable(self, controllable):
         # defines whether e.t. can be controlled by the player
-        self.is_controllable = controllable
+        if not controllable:
+            self.state = STATE_INTRO
+        elif self.state == STATE_INTRO:
+            self.state = STATE_WALKING
 
     def set_levitation_sound(self, levitation_sound):
         """set the levitation sound"""
@@ -98,392 +183,366 @@ class ET:
 
     def start_finish_head_raise(self):
         """start the escaped pit moving state (stay in frame 3 until out of pit collision)"""
-        self.escaped_pit_moving = True
+        self.state = STATE_ESCAPED_PIT_MOVING
         self.image = self.head_locked_image  # stay in head_raise_3
 
+    def finish_pit_escape(self):
+        """ends the escaped pit moving state once e.t. is clear of the pit: the head lowers"""
+        self._start_head_lowering(STATE_FINISHING_HEAD_RAISE)
+        self.levitation_sound_timer = 0
+
+    def _start_head_lowering(self, state):
+        # head raise frames 4 to 6, in one of the finishing head raise states
+        self.state = state
+        self.finish_frame = 4
+        self.finish_counter = 0
+
     def handle_input(self, keys, space_pressed_once):
+        # returns what happened ("STEP", "HEAD_RAISE", "FALL_COMPLETE", "ESCAPE_PIT") or None
+        return self._state_handlers[self.state](self, keys, space_pressed_once)
 
-        result = None  # return value to indicate what action occurred
+    def _handle_intro(self, keys, space_pressed_once):
+        # allow only visual direction change during descent (look left by default)
+        self.image = self.atlas.get("idle", 0, FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT)
+        return None
 
-        # if e.t. is not yet controllable, ignore all inputs
-        if not self.is_controllable:
-            # block all inputs when finishing head raise animation
-            if self.finishing_head_raise:
-                return result
-            # allow only visual direction change during descent
-            if keys[pygame.K_RIGHT]:
-                self.image = pygame.transform.flip(self.images["idle"], True, False)
-            else:
-                self.image = self.images["idle"]  # look left by default
-            return
+    def _handle_finishing_head_raise(self, keys, space_pressed_once):
+        # block all movement when finishing head raise animation (frames 4 to 6) after a levitation
+        self.movement_loop = None
+        self.moving = False
 
-        # block all movement when finishing head raise animation after pit escape
-        if self.finishing_head_raise:
-            self.walk_sound.stop()
-            self.run_sound.stop() 
-            self.moving = False
-            
-            self.finish_counter += 1
-            if self.finish_counter >= self.head_raise_speed:
-                self.finish_counter = 0
-                if self.finish_frame <= 6:
-                    self.image = self.images["head_raise"][self.finish_frame]
-                    self.finish_frame += 1
-                else:
-                    self.image = self.images["idle"]
-                    self.finishing_head_raise = False
+        self.finish_counter += 1
+        if self.finish_counter >= self.head_raise_speed:
+            self.finish_counter = 0
+            if self.finish_frame <= 6:
+                self.image = self.images["head_raise"][self.finish_frame]
+                self.finish_frame += 1
             else:
-                if self.finish_frame <= 6:
-                    self.image = self.images["head_raise"][self.finish_frame]
-                else:
-                    self.image = self.images["idle"]
-            return result
+                self.image = self.images["idle"]
+                self.state = FINISHED_HEAD_RAISE_STATES[self.state]
+        else:
+            # maintain current frame while counter progresses
+            if self.finish_frame <= 6:
+                self.image = self.images["head_raise"][self.finish_frame]
+            else:
+                self.image = self.images["idle"]
+        return None
 
+    def _handle_head_raise(self, keys, space_pressed_once):
         # block all movement when head raise animation is playing (except in pit)
-        if self.head_raise_active and not self.in_pit and not self.is_falling_into_pit:
-            # check if head raise just started
-            if self.head_raise_just_started:
-                self.head_raise_just_started = False
-                result = "HEAD_RAISE"
+        result = None
+        # check if head raise just started
+        if self.head_raise_just_started:
+            self.head_raise_just_started = False
+            result = "HEAD_RAISE"
+        self._animate_head_raise()
+        return result
 
-            # animate head raise frames with timing control
-            self.head_raise_counter += 1
-            if self.head_raise_counter >= self.head_raise_speed:
-                self.head_raise_counter = 0
-                self.head_raise_frame += 1
-                
-                # check if animation is complete
-                if self.head_raise_frame >= len(self.images["head_raise"]):
-                    self.head_raise_active = False
-                    self.head_raise_frame = 0
-                    self.image = self.images["idle"]
-                else:
-                    self.image = self.images["head_raise"][self.head_raise_frame]
-            else:
-                self.image = self.images["head_raise"][self.head_raise_frame]
-            return result
+    def _animate_head_raise(self):
+        # animate head raise frames with timing control, back to idle after the last one
+        self.head_raise_counter += 1
+        if self.head_raise_counter >= self.head_raise_speed:
+            self.head_raise_counter = 0
+            self.head_raise_frame += 1
 
-        # handle falling into pit animation
-        if self.is_falling_into_pit:
-            self.walk_sound.stop()
-            self.run_sound.stop()
-            self.moving = False
-            
-            # enable head_raise during fall
-            if space_pressed_once and not self.head_raise_active:
-                self.head_raise_active = True
+            # check if animation is complete
+            if self.head_raise_frame >= len(self.images["head_raise"]):
+                self.state = STATE_WALKING
                 self.head_raise_frame = 0
-                self.head_raise_counter = 0
-                self.head_raise_sound.play()
-                return "HEAD_RAISE"
-            
-            # handle head_raise animation during fall
-            if self.head_raise_active:
-                self.head_raise_counter += 1
-                if self.head_raise_counter >= self.head_raise_speed:
-                    self.head_raise_counter = 0
-                    self.head_raise_frame += 1
-                    
-                    # when we reach frame 3, then we stop the fall
-                    if self.head_raise_frame == 3:
-                        self.is_falling_into_pit = False
-                        self.in_pit = True
-                        self.rising_out_of_pit = True
-                        self.head_raise_active = False
-                        self.y -= 9 # # small visual jump when starting levitation
-                        return result
-                
-                self.image = self.images["head_raise"][self.head_raise_frame]
-                # keep falling during animation
-                self.y += self.pit_fall_speed
-            else:
-                # normal fall
                 self.image = self.images["idle"]
-                self.y += self.pit_fall_speed
-
-            # check if e.t. has reached the bottom of the pit
-            if self.y >= self.pit_target_y:
-                self.y = self.pit_target_y
-                self.is_falling_into_pit = False
-                self.in_pit = True
-                result = "FALL_COMPLETE"
-
-            # flip image to right only if right key is held
-            if keys[pygame.K_RIGHT]:
-                self.image = pygame.transform.flip(self.image, True, False)
             else:
-                self.image = pygame.transform.flip(self.image, False, False)
-            return result
+                self.image = self.images["head_raise"][self.head_raise_frame]
+        else:
+            # hold current frame while counter builds up
+            self.image = self.images["head_raise"][self.head_raise_frame]
 
-        # handle levitation when trying to escape from pit
-        if self.in_pit and self.rising_out_of_pit:
-            self.image = self.head_locked_image  # always show head_raise_3
-
-            # play levitation sound with delay
-            self.levitation_sound_timer += 1
-            if self.levitation_sound_timer >= self.levitation_sound_delay:
-                self.levitation_sound_timer = 0
-                if self.levitation_sound:
-                    self.levitation_sound.play()
-
-            # store position before levitation movement
-            levitation_old_y = self.y
-
-            # move up when up key is pressed (levitation)
-            if keys[pygame.K_UP]:
-                self.y -= self.levitation_speed
-            # move down when down key is pressed (levitation)
-            if keys[pygame.K_DOWN]:
-                self.y += self.levitation_speed
-
-            # check if levitation movement counts as a step
-            distance_moved_levitation = abs(self.y - levitation_old_y)
-            if distance_moved_levitation >= self.step_threshold - 0.5:
-                result = "STEP"
-            
-            # flip image to right temporarily
-            if keys[pygame.K_RIGHT]:
-                self.image = pygame.transform.flip(self.head_locked_image, True, False)
-            else:
-                self.image = pygame.transform.flip(self.head_locked_image, False, False)
+    def _handle_falling(self, keys, space_pressed_once):
+        # handle falling into pit animation
+        result = None
+        self.movement_loop = None
+        self.moving = False
 
-            # check if et reached the top of the pit (escaped the pit?)
-            et_top_y = self.y - (self.image.get_height() - self.images["idle"].get_height())
-            if et_top_y <= self.pit_escape_y:
-                self.rising_out_of_pit = False
-                self.image = self.images["idle"]
-                return "ESCAPE_PIT"
-
-            # check if et reached the bottom platform of the pit
-            et_bottom_y = self.y + self.images["idle"].get_height()
-            if et_bottom_y >= self.pit_bottom_y:
-                self.rising_out_of_pit = False
-                self.finishing_head_raise = True
-                self.finish_frame = 4
-                self.finish_counter = 0
-                return result
-            return result
+        # enable head_raise during fall
+        if space_pressed_once and self.state == STATE_FALLING:
+            self.state = STATE_FALLING_HEAD_RAISE
+            self.head_raise_frame = 0
+            self.head_raise_counter = 0
+            self.head_raise_sound.play()
+            return "HEAD_RAISE"
 
-        # pit movement and levitation setup
-        if self.in_pit:
-            current_speed = self.speed  # no run allowed in pit
-
-            # start head raise animation (frames 0 to 3) if pressing space and not already levitating
-            if (
-                space_pressed_once and 
-                not self.rising_out_of_pit and 
-                not self.head_raise_active and 
-                not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN])
-            ):
-                self.head_raise_active = True
-                self.head_raise_frame = 0
+        # handle head_raise animation during fall
+        raising = self.state == STATE_FALLING_HEAD_RAISE
+        if raising:
+            self.head_raise_counter += 1
+            if self.head_raise_counter >= self.head_raise_speed:
                 self.head_raise_counter = 0
-                self.head_raise_just_started = True
-                self.head_raise_sound.play()
-                return "HEAD_RAISE"
+                self.head_raise_frame += 1
 
-        else:
-            # normal movement speed (with boost when space is held)
-            current_speed = self.boost_speed if keys[pygame.K_SPACE] else self.speed
+                # when we reach frame 3, then we stop the fall
+                if self.head_raise_frame == 3:
+                    self.state = STATE_LEVITATING
+                    self.y -= 9 # # small visual jump when starting levitation
+                    return result
 
-        # adjust animation speed based on running state
-        if not self.in_pit:
-            self.walk_anim_speed = 2 if keys[pygame.K_SPACE] else 3
+            # keep falling during animation
+            self.y += self.pit_fall_speed
         else:
-            self.walk_anim_speed = 3
-            
-        moving = False # adjust animation speed: faster when running
+            # normal fall
+            self.y += self.pit_fall_speed
+
+        # check if e.t. has reached the bottom of the pit
+        if self.y >= self.pit_target_y:
+            self.y = self.pit_target_y
+            # a head raise goes on at the bottom
+            self.state = STATE_PIT_HEAD_RAISE if raising else STATE_PIT
+            result = "FALL_COMPLETE"
+
+        # face right only if right key is held
+        facing = FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT
+        if raising:
+            self.image = self.atlas.get("head_raise", self.head_raise_frame, facing)
+        else:
+            self.image = self.atlas.get("idle", 0, facing)
+        return result
 
-        # store previous position for step detection
-        old_x, old_y = self.x, self.y
+    def _handle_levitating(self, keys, space_pressed_once):
+        # handle levitation when trying to escape from pit
+        result = None
+        self.image = self.head_locked_image  # always show head_raise_3
+
+        # play levitation sound with delay
+        self.levitation_sound_timer += 1
+        if self.levitation_sound_timer >= self.levitation_sound_delay:
+            self.levitation_sound_timer = 0
+            if self.levitation_sound:
+                self.levitation_sound.play()
+
+        # store position before levitation movement
+        levitation_old_y = self.y
+
+        # move up when up key is pressed (levitation)
+        if keys[pygame.K_UP]:
+            self.y -= self.levitation_speed
+        # move down when down key is pressed (levitation)
+        if keys[pygame.K_DOWN]:
+            self.y += self.levitation_speed
+
+        # check if levitation movement counts as a step
+        distance_moved_levitation = abs(self.y - levitation_old_y)
+        if distance_moved_levitation >= self.step_threshold - 0.5:
+            result = "STEP"
+
+        # face right temporarily
+        self.image = self.atlas.get("head_raise", 3, FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT)
+
+        # check if et reached the top of the pit (escaped the pit?)
+        et_top_y = self.y - (self.image.get_height() - self.images["idle"].get_height())
+        if et_top_y <= self.pit_escape_y:
+            self.state = STATE_PIT
+            self.image = self.images["idle"]
+            return "ESCAPE_PIT"
 
-        # handle escaped pit moving state (ET can move but stays in head_raise_3)
-        if self.escaped_pit_moving:
-            # play levitation sound with delay (same as in pit)
-            self.levitation_sound_timer += 1
-            if self.levitation_sound_timer >= self.levitation_sound_delay:
-                self.levitation_sound_timer = 0
-                if self.levitation_sound:
-                    self.levitation_sound.play()
-            
-            # ET can move normally but image stays locked to head_raise_3
-            if keys[pygame.K_LEFT]:
-                self.x -= current_speed
-                moving = True
-            if keys[pygame.K_RIGHT]:
-                self.x += current_speed
-                moving = True
-            if keys[pygame.K_UP]:
-                self.y -= current_speed
-                moving = True
-            if keys[pygame.K_DOWN]:
-                self.y += current_speed
-                moving = True
-            
-            # always keep head_raise_3 image
-            self.image = self.head_locked_image
-            if keys[pygame.K_RIGHT]:
-                self.image = pygame.transform.flip(self.head_locked_image, True, False)
-            else:
-                self.image = pygame.transform.flip(self.head_locked_image, False, False)
-            
-            # check if moved enough to count as step
-            distance_moved = ((self.x - old_x) ** 2 + (self.y - old_y) ** 2) ** 0.5
-            if distance_moved >= self.step_threshold:
-                if result is None:
-                    result = "STEP"
-            
-            return result
+        # check if et reached the bottom platform of the pit
+        et_bottom_y = self.y + self.images["idle"].get_height()
+        if et_bottom_y >= self.pit_bottom_y:
+            self._start_head_lowering(STATE_PIT_FINISHING_HEAD_RAISE)
+        return result
 
-        
-        # trigger head raise animation if standing still and pressing space
-        if space_pressed_once and not self.head_raise_active and not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN]):
-            self.head_raise_active = True
+    def _handle_pit(self, keys, space_pressed_once):
+        # pit movement and levitation setup
+        result = None
+        current_speed = self.speed  # no run allowed in pit
+
+        # start head raise animation (frames 0 to 3) if pressing space and not already raising the head
+        if (
+            space_pressed_once and
+            self.state == STATE_PIT and
+            not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN])
+        ):
+            self.state = STATE_PIT_HEAD_RAISE
             self.head_raise_frame = 0
             self.head_raise_counter = 0
             self.head_raise_just_started = True
             self.head_raise_sound.play()
-        
-        # handle left/right movement
-        if keys[pygame.K_LEFT]: # ⭠
-            if self.in_pit:
-                if self.x > self.pit_left_limit: # left limit in pit
-                    self.x -= current_speed
-                    moving = True
-            else:
-                self.x -= current_speed
-                moving = True
+            return "HEAD_RAISE"
 
-        if keys[pygame.K_RIGHT]: # ⭢
-            if self.in_pit:
-                if self.x < self.pit_right_limit: # right limit in pit
-                    self.x += current_speed
-                    moving = True
-            else:
-                self.x += current_speed
-                moving = True
-                
-        # handle up/down movement (only outside pit)
-        if not self.in_pit:
-            if keys[pygame.K_UP] and not self.in_pit:
-                self.y -= current_speed
-                moving = True
-            if keys[pygame.K_DOWN] and not self.in_pit:
-                self.y += current_speed
-                moving = True
-                
-        # check if e.t. moved enough to count as a step (in the pit too)
-        if self.in_pit and not self.head_raise_active and not self.rising_out_of_pit:
+        self.walk_anim_speed = 3
+        moving = False
+        raising = self.state == STATE_PIT_HEAD_RAISE
+
+        # store previous position for step detection
+        old_x, old_y = self.x, self.y
+
+        # handle left/right movement, between the pit walls (no up/down in the pit)
+        if keys[pygame.K_LEFT] and self.x > self.pit_left_limit: # ⭠
+            self.x -= current_speed
+            moving = True
+        if keys[pygame.K_RIGHT] and self.x < self.pit_right_limit: # ⭢
+            self.x += current_speed
+            moving = True
+
+        # check if e.t. moved enough to count as a step
+        if not raising:
             distance_moved = ((self.x - old_x) ** 2 + (self.y - old_y) ** 2) ** 0.5
             if distance_moved >= self.step_threshold:
-                if result is None:
-                    result = "STEP"
+                result = "STEP"
 
         self.update_animation(moving, keys)
 
-        # play head raise animation if it's currently active
-        if self.head_raise_active:
+        # play head raise animation if it's currently active: stop at frame 3 and start levitation
+        if raising:
             self.head_raise_counter += 1
             if self.head_raise_counter >= self.head_raise_speed:
                 self.head_raise_counter = 0
                 self.head_raise_frame += 1
-
-                if self.in_pit:
-                    # in pit: stop at frame 3 and start levitation
-                    if self.head_raise_frame == 3:
-                        self.head_raise_active = False
-                        self.rising_out_of_pit = True
-                        self.image = self.head_locked_image
-                        self.y -= 9  # small visual jump when starting levitation
-                    elif self.head_raise_frame < len(self.images["head_raise"]):
-                        self.image = self.images["head_raise"][self.head_raise_frame]
-                else:
-                    # outside pit: play full animation then return to idle
-                    if self.head_raise_frame >= len(self.images["head_raise"]):
-                        self.head_raise_active = False
-                        self.head_raise_frame = 0
-                        self.image = self.images["idle"]
-                    else:
-                        self.image = self.images["head_raise"][self.head_raise_frame]
+                if self.head_raise_frame == 3:
+                    self.state = STATE_LEVITATING
+                    self.image = self.head_locked_image
+                    self.y -= 9  # small visual jump when starting levitation
+                elif self.head_raise_frame < len(self.images["head_raise"]):
+                    self.image = self.images["head_raise"][self.head_raise_frame]
             else:
                 # hold current frame while counter builds up
                 self.image = self.images["head_raise"][self.head_raise_frame]
-            return
+            return None
 
-        # finish head raise animation after landing from levitation (frames 4 to 6)
-        if self.finishing_head_raise:
-            # block all movement during finishing animation
-            self.walk_sound.stop()
-            self.run_sound.stop() 
+        # handle movement sounds: only walking sounds, no running
+        if moving:
+            if not self.moving:
+                self.moving = True
+                self.movement_loop = "et_walk"
+                self.is_running = False
+        elif self.moving:
+            self.movement_loop = None
             self.moving = False
-            
-            self.finish_counter += 1
-            if self.finish_counter >= self.head_raise_speed:
-                self.finish_counter = 0
-                if self.finish_frame <= 6:
-                    self.image = self.images["head_raise"][self.finish_frame]
-                    self.finish_frame += 1
-                else:
-                    self.image = self.images["idle"]
-                    self.finishing_head_raise = False
-            else:
-                # maintain current frame while counter progresses
-                if self.finish_frame <= 6:
-                    self.image = self.images["head_raise"][self.finish_frame]
+        return result
+
+    def _handle_escaped_pit_moving(self, keys, space_pressed_once):
+        # escaped pit moving state (ET can move but stays in head_raise_3)
+        result = None
+        current_speed = self.boost_speed if keys[pygame.K_SPACE] else self.speed
+        self.walk_anim_speed = 2 if keys[pygame.K_SPACE] else 3
+        moving = False
+
+        # store previous position for step detection
+        old_x, old_y = self.x, self.y
+
+        # play levitation sound with delay (same as in pit)
+        self.levitation_sound_timer += 1
+        if self.levitation_sound_timer >= self.levitation_sound_delay:
+            self.levitation_sound_timer = 0
+            if self.levitation_sound:
+                self.levitation_sound.play()
+
+        # ET can move normally but image stays locked to head_raise_3
+        if keys[pygame.K_LEFT]:
+            self.x -= current_speed
+            moving = True
+        if keys[pygame.K_RIGHT]:
+            self.x += current_speed
+            moving = True
+        if keys[pygame.K_UP]:
+            self.y -= current_speed
+            moving = True
+        if keys[pygame.K_DOWN]:
+            self.y += current_speed
+            moving = True
+
+        # always keep head_raise_3 image
+        self.image = self.atlas.get("head_raise", 3, FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT)
+
+        # check if moved enough to count as step
+        distance_moved = ((self.x - old_x) ** 2 + (self.y - old_y) ** 2) ** 0.5
+        if distance_moved >= self.step_threshold:
+            result = "STEP"
+        return result
+
+    def _handle_walking(self, keys, space_pressed_once):
+        # normal movement speed (with boost when space is held) and faster animation when running
+        result = None
+        current_speed = self.boost_speed if keys[pygame.K_SPACE] else self.speed
+        self.walk_anim_speed = 2 if keys[pygame.K_SPACE] else 3
+        moving = False
+
+        # store previous position for step detection
+        old_x, old_y = self.x, self.y
+
+        # trigger head raise animation if standing still and pressing space
+        if space_pressed_once and not (keys[pygame.K_LEFT] or keys[pygame.K_RIGHT] or keys[pygame.K_UP] or keys[pygame.K_DOWN]):
+            self.state = STATE_HEAD_RAISE
+            self.head_raise_frame = 0
+            self.head_raise_counter = 0
+            self.head_raise_just_started = True
+            self.head_raise_sound.play()
+            self._animate_head_raise()
+            return None
+
+        # handle movement
+        if keys[pygame.K_LEFT]: # ⭠
+            self.x -= current_speed
+            moving = True
+        if keys[pygame.K_RIGHT]: # ⭢
+            self.x += current_speed
+            moving = True
+        if keys[pygame.K_UP]:
+            self.y -= current_speed
+            moving = True
+        if keys[pygame.K_DOWN]:
+            self.y += current_speed
+            moving = True
+
+        self.update_animation(moving, keys)
+
+        # handle movement sounds: walking and running
+        if moving:
+            if not self.moving:
+                self.moving = True
+                if keys[pygame.K_SPACE]:
+                    self.movement_loop = "et_run"
+                    self.is_running = True
                 else:
-                    self.image = self.images["idle"]
-            return
-
-        # handle movement sounds
-        if self.in_pit:
-            # in pit: only walking sounds, no running
-            if moving:
-                if not self.moving:
-                    self.moving = True
-                    self.walk_sound.play(-1)
+                    self.movement_loop = "et_walk"
                     self.is_running = False
             else:
-                # outside pit: handle both walking and running sounds
-                if self.moving:
-                    self.walk_sound.stop()
-                    self.moving = False
-            return result
+                # switch between walk and run sounds based on space key
+                if keys[pygame.K_SPACE] and not self.is_running:
+                    self.movement_loop = "et_run"
+                    self.is_running = True
+                elif not keys[pygame.K_SPACE] and self.is_running:
+                    self.movement_loop = "et_walk"
+                    self.is_running = False
         else:
-            if moving:
-                if not self.moving:
-                    self.moving = True
-                    if keys[pygame.K_SPACE]:
-                        self.run_sound.play(-1)
-                        self.is_running = True
-                    else:
-                        self.walk_sound.play(-1)
-                        self.is_running = False
-                else:
-                    # switch between walk and run sounds based on space key
-                    if keys[pygame.K_SPACE] and not self.is_running:
-                        self.walk_sound.stop()
-                        self.run_sound.play(-1)
-                        self.is_running = True
-                    elif not keys[pygame.K_SPACE] and self.is_running:
-                        self.run_sound.stop()
-                        self.walk_sound.play(-1)
-                        self.is_running = False
-            else:
-                # stop all sounds when not moving
-                if self.moving:
-                    self.moving = False
-                    self.walk_sound.stop()
-                    self.run_sound.stop()
-                    
-        # check if e.t. moved enough to count as a step
-        if not self.in_pit and not self.head_raise_active and result is None:
-            distance_moved = ((self.x - old_x) ** 2 + (self.y - old_y) ** 2) ** 0.5
-            if distance_moved >= self.step_threshold:
-                result = "STEP"
+            # stop all sounds when not moving
+            if self.moving:
+                self.moving = False
+                self.movement_loop = None
 
+        # check if e.t. moved enough to count as a step
+        distance_moved = ((self.x - old_x) ** 2 + (self.y - old_y) ** 2) ** 0.5
+        if distance_moved >= self.step_threshold:
+            result = "STEP"
         return result
 
+    # handle_input handlers, in state order
+    _state_handlers = (
+        _handle_intro,
+        _handle_finishing_head_raise,
+        _handle_head_raise,
+        _handle_falling,
+        _handle_levitating,
+        _handle_pit,
+        _handle_escaped_pit_moving,
+        _handle_walking,
+        _handle_falling,                # FALLING_HEAD_RAISE
+        _handle_pit,                    # PIT_HEAD_RAISE
+        _handle_finishing_head_raise,   # PIT_FINISHING_HEAD_RAISE
+        _handle_finishing_head_raise,   # FALLING_FINISHING_HEAD_RAISE
+    )
+
     def update_animation(self, moving, keys):
+        # face right when moving right
+        facing = FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT
+
         # switch frames when e.t. is moving
         if moving:
             self.walk_counter += 1
@@ -491,73 +550,66 @@ class ET:
             if self.walk_counter >= self.walk_anim_speed:
                 self.walk_counter = 0
                 self.walk_frame = (self.walk_frame + 1) % len(self.images["walk"])
-            self.image = self.images["walk"][self.walk_frame]
+            self.image = self.atlas.get("walk", self.walk_frame, facing)
         else:
             # show idle image when not moving
-            self.image = self.images["idle"]
-
-        # flip image horizontally when moving right
-        if keys[pygame.K_RIGHT]:
-            self.image = pygame.transform.flip(self.image, True, False)
+            self.image = self.atlas.get("idle", 0, facing)
             
     def setup_pit_fall(self, center_x, center_y, center_width, center_height):
         """set up parameters for falling into the pit"""
         self.x = center_x + (center_width - self.image.get_width()) // 2
         self.y = center_y
-        self.is_falling_into_pit = True
+        # a fall during a head lowering comes after it
+        if self.state == STATE_FINISHING_HEAD_RAISE:
+            self.state = STATE_FALLING_FINISHING_HEAD_RAISE
+        elif self.state != STATE_FALLING_FINISHING_HEAD_RAISE:
+            self.state = STATE_FALLING
         self.pit_target_y = center_y + 360 - self.image.get_height()
         self.pit_escape_y = center_y
         self.pit_bottom_y = center_y + 360
         self.pit_left_limit = center_x + 192
         self.pit_right_limit = center_x + center_width - 192 - self.image.get_width()
-        self.rising_out_of_pit = False
+        # a head raise cut short by the fall (pixel collisions can catch e.t. mid raise) starts over:
+        # the fall's own raise counts frames from 0 up to 3
+        self.head_raise_frame = 0
+        self.head_raise_counter = 0
+        self.head_raise_just_started = False
 
     def reset_for_level_transition(self, new_x, new_y):
         """reset E.T. for a level transition"""
         self.x = new_x
         self.y = new_y
-        self.in_pit = False
-        self.is_falling_into_pit = False
-        self.rising_out_of_pit = False
-        self.head_raise_active = False
-        self.finishing_head_raise = False
+        # e.t. keeps his head locked until he is clear of the pit he escaped, even on another screen
+        if self.state not in (STATE_INTRO, STATE_ESCAPED_PIT_MOVING):
+            self.state = STATE_WALKING
         self.image = self.images["idle"]
-        self.walk_sound.stop()
-        self.run_sound.stop()
+        self.movement_loop = None
         self.moving = False
 
-    def draw(self, screen, spaceship=None):
+    def get_draw_position(self):
+        """returns where the current frame is drawn (taller head raise frames grow upward)"""
+        return self.x, self.y - (self.image.get_height() - self.images["idle"].get_height())
+
+    def get_mask(self):
+        """returns the collision mask of the current frame"""
+        return self.atlas.get_mask(self.image)
+
+    def get_blit(self, spaceship=None):
+        """returns the (surface, dest, area) blit that draws e.t., or None when he is hidden"""
+        draw_x, draw_y = self.get_draw_position()
         # if e.t. is in the spaceship during intro, apply the same clipping
         if spaceship is not None and spaceship.is_et_in_spaceship():
             # visible zone starts at y = 71 (top of playable screen)
             visible_zone_top = 71
-            
-            # calculate e.t.'s drawing position
-            idle_height = self.images["idle"].get_height()
             image_height = self.image.get_height()
-            height_diff = image_height - idle_height
-            draw_y = self.y - height_diff
-            
+
             # if e.t. is completely above the visible zone
             if draw_y + image_height <= visible_zone_top:
-                return  # draw nothing
-            
-            # if e.t. is partially or completely visible
+                return None  # draw nothing
+
+            # if e.t. is partially visible, the top part is cut
             if draw_y < visible_zone_top:
-                # top part cut - calculate which part to draw
                 cut_top = visible_zone_top - draw_y
-                visible_height = image_height - cut_top
-                
-                # create subsurface (visible part only)
-                visible_part = self.image.subsurface(0, cut_top, self.image.get_width(), visible_height)
-                screen.blit(visible_part, (self.x, visible_zone_top))
-            else:
-                # e.t. completely visible
-                screen.blit(self.image, (self.x, draw_y))
-        else:
-            # normal e.t. display
-            idle_height = self.images["idle"].get_height()
-            image_height = self.image.get_height()
-            height_diff = image_height - idle_height
-            draw_y = self.y - height_diff
-            screen.blit(self.image, (self.x, draw_y))
\ No newline at end of file
+                return self.image, (draw_x, visible_zone_top), (0, cut_top, self.image.get_width(), image_height - cut_top)
+
+        return self.image, (draw_x, draw_y), None
@@ -0,0 +1,33 @@
+# render_queue.py
+import pygame
+
+
+def get_blit_rect(surface, dest, area=None):
+    """returns the target area a (surface, dest, area) blit covers, before clipping to the target"""
+    width, height = pygame.Rect(area).size if area is not None else surface.get_size()
+    return pygame.Rect(dest[0], dest[1], width, height)
+
+
+class RenderQueue:
+    """a frame's blits, collected in drawing order and submitted in one Surface.blits call.
+
+    blits are (surface, dest, area) tuples as for Surface.blit: area is the part of the
+    surface to draw (None: all of it), so a sprite cut at the edge of the visible zone is a
+    blit with an area rather than a new subsurface every frame.
+    """
+
+    def __init__(self):
+        self.blits = []
+
+    def add(self, surface, dest, area=None):
+        """queues a blit, drawn over the ones queued before it"""
+        self.blits.append((surface, dest, area))
+
+    def extend(self, blits):
+        """queues (surface, dest, area) blits, in order"""
+        self.blits.extend(blits)
+
+    def draw(self, target):
+        """draws the queued blits on target and empties the queue"""
+        target.blits(self.blits, doreturn=False)
+        self.blits.clear()
@@ -0,0 +1,197 @@
+# renderer.py
+import numpy as np
+import pygame
+from frame_profiler import profiler, PHASE_RENDER, PHASE_COUNTER
+from graphics import SCREEN_WIDTH, SCREEN_HEIGHT, get_center_area
+from render_queue import RenderQueue, get_blit_rect
+
+# the assets are atari pixels drawn as blocks of 6 x 3 window pixels. the rows are in phase with
+# the play area, which starts at y = 71 on every screen: native row k is window rows 3k - 1 to
+# 3k + 1, so at native resolution the 960 x 566 window is 160 x 189 pixels (the first row is
+# 2 window pixels tall)
+NATIVE_SCALE = (6, 3)
+NATIVE_ROW_SHIFT = -get_center_area(SCREEN_WIDTH, "FOREST1")[1] % NATIVE_SCALE[1]  # window rows above the first native row
+NATIVE_SIZE = (SCREEN_WIDTH // NATIVE_SCALE[0], -(-(SCREEN_HEIGHT + NATIVE_ROW_SHIFT) // NATIVE_SCALE[1]))
+
+
+def get_native_image(image, scale=NATIVE_SCALE, row_shift=0):
+    """returns a window resolution image at native resolution, one pixel per block (its center).
+
+    blocks start at the image's top left corner, or row_shift rows above it.
+    """
+    x_scale, y_scale = scale
+    width, height = image.get_size()
+    columns = np.minimum(np.arange(-(-width // x_scale)) * x_scale + x_scale // 2, width - 1)
+    rows = np.clip(np.arange(-(-(height + row_shift) // y_scale)) * y_scale - row_shift + y_scale // 2, 0, height - 1)
+    if image.get_bytesize() < 3:
+        # palette images (not converted when running headless): sample a 32 bit copy
+        source, image = image, pygame.Surface((width, height), pygame.SRCALPHA, 32)
+        image.blit(source, (0, 0))
+    has_alpha = image.get_flags() & pygame.SRCALPHA
+    native = pygame.Surface((len(columns), len(rows)), pygame.SRCALPHA if has_alpha else 0, image)
+    pygame.surfarray.blit_array(native, pygame.surfarray.pixels3d(image)[columns[:, None], rows])
+    if has_alpha:
+        pygame.surfarray.pixels_alpha(native)[...] = pygame.surfarray.pixels_alpha(image)[columns[:, None], rows]
+    return native
+
+class DirtyRectRenderer:
+    """redraws only what changed since the last frame.
+
+    each screen's static layers come from GameStateManager.get_backdrop; every frame the
+    areas the sprites covered last frame are restored from it, the sprites are drawn
+    again, and the list of changed areas is returned for pygame.display.update. the
+    counter is left alone unless its value changed or a sprite touched it. all of it is
+    queued and drawn in one Surface.blits call.
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.screen = simulation.screen
+        self.last_state = None
+        self.sprite_rects = []
+        self.queue = RenderQueue()
+
+    def invalidate(self):
+        """forces a full redraw on the next frame (e.g. after something else drew on the screen)"""
+        self.last_state = None
+
+    def render(self):
+        """draws the current frame, returns the dirty rects"""
+        simulation = self.simulation
+        game_state_manager = simulation.game_state_manager
+        current_state = game_state_manager.get_current_state()
+        backdrop = game_state_manager.get_backdrop(current_state)
+        queue = self.queue
+
+        counter = simulation.counter
+        counter_rect = simulation.get_counter_rect()
+
+        if current_state != self.last_state:
+            # new screen: everything changed
+            queue.add(backdrop, (0, 0))
+            dirty_rects = [self.screen.get_rect()]
+            redraw_counter = True
+        else:
+            # erase last frame's sprites
+            for rect in self.sprite_rects:
+                queue.add(backdrop, rect, rect)
+            dirty_rects = list(self.sprite_rects)
+            # the counter only needs drawing when its value changed or a sprite went over it
+            redraw_counter = counter_rect.collidelist(self.sprite_rects) != -1
+            if counter.is_dirty():
+                queue.add(backdrop, counter_rect, counter_rect)
+                redraw_counter = True
+
+        sprite_blits = simulation.get_sprite_blits()
+        queue.extend(sprite_blits)
+        screen_rect = self.screen.get_rect()
+        self.sprite_rects = [get_blit_rect(*blit).clip(screen_rect) for blit in sprite_blits]
+        self.last_state = current_state
+        dirty_rects += self.sprite_rects
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+
+        # the counter is drawn over the sprites
+        if redraw_counter or counter_rect.collidelist(self.sprite_rects) != -1:
+            counter_blit = simulation.get_counter_blit()
+            if counter_blit is not None:
+                queue.add(*counter_blit)
+            dirty_rects.append(counter_rect)
+        if profiler.active:
+            profiler.mark(PHASE_COUNTER)
+
+        # the whole frame in one call
+        queue.draw(self.screen)
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+        return dirty_rects
+
+
+class NativeRenderer:
+    """composes each frame at native resolution and scales it to the target once.
+
+    fills and blits work on a 160 x 189 surface instead of the 960 x 566 window: screen
+    backdrops and sprite frames are sampled down to native images once, the frame's
+    blits are mapped to native images and coordinates, and transform.scale writes the
+    frame into the target (the window, at whatever size it has). sprites are snapped to
+    the native rows, which are in phase with the backdrops' art.
+    """
+
+    def __init__(self, simulation, target):
+        self.simulation = simulation
+        self.queue = RenderQueue()
+        # id(window image): native image
+        self.images = {}
+        for atlas in (simulation.et.atlas, simulation.spaceship.atlas):
+            for surface in atlas.surfaces:
+                self.images[id(surface)] = get_native_image(surface)
+        # counter value the native counter strip in images was sampled at
+        self.counter_strip_value = None
+        self.set_target(target)
+
+    def set_target(self, target):
+        """draws into another surface from now on (e.g. the window after a resize)"""
+        self.target = target
+        # transform.scale only writes into a surface of its source's pixel format
+        self.surface = pygame.Surface(NATIVE_SIZE, 0, target)
+        self.backdrops = {}
+        # the first native row is partly above the window: it is scaled on its own, so the
+        # other rows are scaled to whole blocks
+        native_width, native_height = NATIVE_SIZE
+        width, height = target.get_size()
+        top = max(1, round((NATIVE_SCALE[1] - NATIVE_ROW_SHIFT) * height / SCREEN_HEIGHT))
+        self.scaled_parts = [
+            (self.surface.subsurface(0, 0, native_width, 1), target.subsurface(0, 0, width, top)),
+            (self.surface.subsurface(0, 1, native_width, native_height - 1), target.subsurface(0, top, width, height - top)),
+        ]
+
+    def get_native_blit(self, surface, dest, area=None):
+        """returns a window (surface, dest, area) blit at native resolution"""
+        x_scale, y_scale = NATIVE_SCALE
+        native = self.images.get(id(surface))
+        if native is None:
+            # not a known image: sampled as it is drawn
+            native = get_native_image(surface)
+        dest_x, dest_y = int(dest[0]), int(dest[1]) + NATIVE_ROW_SHIFT
+        x, y = dest_x // x_scale, dest_y // y_scale
+        if area is not None:
+            # clip the native image where the whole image would be, so the clip matches the window one
+            area = pygame.Rect(area)
+            image_x, image_y = (dest_x - area.x) // x_scale, (dest_y - area.y) // y_scale
+            area = pygame.Rect(x - image_x, y - image_y, -(-area.width // x_scale), -(-area.height // y_scale))
+        return native, (x, y), area
+
+    def render(self):
+        """draws the current frame into the target, returns the changed areas (all of it)"""
+        simulation = self.simulation
+        game_state_manager = simulation.game_state_manager
+        current_state = game_state_manager.get_current_state()
+        backdrop = self.backdrops.get(current_state)
+        if backdrop is None:
+            backdrop = get_native_image(game_state_manager.get_backdrop(current_state), row_shift=NATIVE_ROW_SHIFT)
+            backdrop = backdrop.convert(self.surface)
+            self.backdrops[current_state] = backdrop
+        queue = self.queue
+
+        queue.add(backdrop, (0, 0))
+        for blit in simulation.get_sprite_blits():
+            queue.add(*self.get_native_blit(*blit))
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+        counter_blit = simulation.get_counter_blit()
+        if counter_blit is not None:
+            # the counter strip is redrawn in place when the value changes: sampled again only then
+            strip = counter_blit[0]
+            if self.counter_strip_value != simulation.counter.strip_value:
+                self.images[id(strip)] = get_native_image(strip)
+                self.counter_strip_value = simulation.counter.strip_value
+            queue.add(*self.get_native_blit(*counter_blit))
+        if profiler.active:
+            profiler.mark(PHASE_COUNTER)
+
+        queue.draw(self.surface)
+        for native, scaled in self.scaled_parts:
+            pygame.transform.scale(native, scaled.get_size(), scaled)
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+        return [self.target.get_rect()]
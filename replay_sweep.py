@@ -0,0 +1,213 @@
+# replay_sweep.py
+#
+# replays a corpus of input recordings (see input_recorder.py) headless on every core and
+# writes one row of results per recording to a single columnar file:
+#
+#     python replay_sweep.py corpus/ --output sweep.npz     numpy arrays, one per column
+#     python replay_sweep.py a.etrec b.etrec --output sweep.csv --workers 4
+#
+# columns: path, frames, start_mode, counter (final Counter.value), screens (screens
+# visited), visited (bitmask of the level ids visited), pit_falls, escapes, games
+# (games started), game_over_frame (frames to the first game over, -1 for none) and
+# error (empty unless the recording could not be replayed).
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from input_recorder import InputRecording, START_TITLE
+
+RECORDING_EXTENSION = ".etrec"
+SHARDS_PER_WORKER = 4  # more shards than workers, so a worker with long recordings does not hold up the sweep
+
+# (column, numpy type) in file order
+COLUMNS = (
+    ("path", str),
+    ("frames", np.int64),
+    ("start_mode", np.int8),
+    ("counter", np.int32),
+    ("screens", np.int16),
+    ("visited", np.int64),
+    ("pit_falls", np.int32),
+    ("escapes", np.int32),
+    ("games", np.int32),
+    ("game_over_frame", np.int64),
+    ("error", str),
+)
+COLUMN_NAMES = tuple(name for name, column_type in COLUMNS)
+
+# the worker process's simulation, and a snapshot of it on the title screen
+_simulation = None
+_title_snapshot = None
+
+
+def replay_stats(simulation, recording):
+    """replays a recording from its starting state, returns its row (see COLUMNS) without path and error"""
+    if recording.start_mode != START_TITLE:
+        recording.start(simulation)
+    level_manager = simulation.level_manager
+    step = simulation.step
+    # screens visited, as a bitmask of level ids
+    visited = 0 if recording.start_mode == START_TITLE else 1 << level_manager.current_level_id
+    games = 0 if recording.start_mode == START_TITLE else 1
+    pit_falls = 0
+    escapes = 0
+    game_over_frame = -1
+    frame = 0
+    for input_bits in recording.frames:
+        frame += 1
+        events = step(input_bits)
+        if events:
+            for event in events:
+                if event == "PIT_FALL":
+                    pit_falls += 1
+                elif event == "ESCAPE_PIT":
+                    escapes += 1
+                elif event == "GAME_START":
+                    games += 1
+                elif event == "GAME_OVER" and game_over_frame < 0:
+                    game_over_frame = frame
+            visited |= 1 << level_manager.current_level_id
+    return (len(recording), recording.start_mode, simulation.counter.value, bin(visited).count("1"), visited,
+            pit_falls, escapes, games, game_over_frame)
+
+
+def _start_worker():
+    # one headless simulation per worker, put back on the title screen before each recording
+    global _simulation, _title_snapshot
+    from simulation import Simulation
+    _simulation = Simulation()
+    _title_snapshot = _simulation.snapshot()
+
+
+def _replay_shard(paths):
+    # replays some recordings, returns their rows as columns
+    if _simulation is None:
+        _start_worker()
+    columns = tuple([] for name in COLUMN_NAMES)
+    for path in paths:
+        try:
+            recording = InputRecording.load(path)
+            _simulation.restore(_title_snapshot)
+            row = (path,) + replay_stats(_simulation, recording) + ("",)
+        except Exception as error:
+            # a bad recording is reported in its row, the sweep goes on
+            row = (path, 0, -1, -1, 0, 0, 0, 0, 0, -1, f"{type(error).__name__}: {error}")
+        for column, value in zip(columns, row):
+            column.append(value)
+    return columns
+
+
+def find_recordings(paths):
+    """returns the recordings among paths, looking into directories recursively"""
+    recordings = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directory_names, file_names in os.walk(path):
+                directory_names.sort()
+                recordings.extend(os.path.join(directory, name) for name in sorted(file_names)
+                                  if name.endswith(RECORDING_EXTENSION))
+        else:
+            recordings.append(path)
+    return recordings
+
+
+def make_shards(paths, shard_count):
+    """splits paths into shard_count lists of path indices, of about the same total file size"""
+    shard_count = max(1, min(shard_count, len(paths)))
+    shards = [[] for _ in range(shard_count)]
+    sizes = [0] * shard_count
+
+    def get_size(index):
+        try:
+            return os.path.getsize(paths[index])
+        except OSError:
+            return 0
+
+    # largest first, each to the lightest shard so far
+    for index in sorted(range(len(paths)), key=get_size, reverse=True):
+        lightest = sizes.index(min(sizes))
+        shards[lightest].append(index)
+        sizes[lightest] += get_size(index)
+    return [shard for shard in shards if shard]
+
+
+def sweep(paths, workers=None, progress=None):
+    """replays recordings on a process pool, returns the results as {column: numpy array}.
+
+    rows are in the order of paths. progress(done, total) is called as shards finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = make_shards(paths, workers * SHARDS_PER_WORKER)
+    shard_paths = [[paths[index] for index in shard] for shard in shards]
+    rows = [None] * len(paths)
+    done = 0
+    if workers == 1:
+        results = map(_replay_shard, shard_paths)
+        executor = None
+    else:
+        # spawn: workers start from a clean pygame state
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_start_worker)
+        results = executor.map(_replay_shard, shard_paths)
+    try:
+        for shard, shard_columns in zip(shards, results):
+            for index, row in zip(shard, zip(*shard_columns)):
+                rows[index] = row
+            done += len(shard)
+            if progress is not None:
+                progress(done, len(paths))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return {name: np.array([row[column] for row in rows], dtype=column_type)
+            for column, (name, column_type) in enumerate(COLUMNS)}
+
+
+def save_results(results, path, level_names=()):
+    """writes sweep results: a .csv file, or a .npz of one array per column (plus level_names)"""
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(COLUMN_NAMES)
+            writer.writerows(zip(*(results[name].tolist() for name in COLUMN_NAMES)))
+    else:
+        np.savez_compressed(path, level_names=np.array(level_names, dtype=str), **results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="replay a corpus of input recordings on every core")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help=f"recordings, or directories of {RECORDING_EXTENSION} files")
+    parser.add_argument("--output", metavar="PATH", default="sweep.npz", help="results file, .npz or .csv")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    paths = find_recordings(args.paths)
+    if not paths:
+        parser.error("no recordings found")
+
+    def progress(done, total):
+        print(f"\r{done}/{total} recordings", end="", flush=True)
+
+    start_time = time.perf_counter()
+    results = sweep(paths, args.workers, progress)
+    elapsed = time.perf_counter() - start_time
+    print()
+
+    from level_data import load_level_table
+    save_results(results, args.output, load_level_table().names)
+
+    frames = int(results["frames"].sum())
+    errors = int((results["error"] != "").sum())
+    game_overs = int((results["game_over_frame"] >= 0).sum())
+    print(f"{len(paths)} recordings, {frames} frames in {elapsed:.1f}s ({frames / elapsed:.0f} frames/s)")
+    print(f"game over in {game_overs}, errors in {errors}, results written to {args.output}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
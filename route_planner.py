@@ -0,0 +1,268 @@
+# route_planner.py
+#
+# cheapest routes across the map in counter points, worked out once so that a bot or a
+# hint can look up e.t.'s next move in O(1) each frame:
+#
+#     planner = RoutePlanner.for_table(level_manager.table)
+#     input_bits = planner.get_next_move(level_id, et.x - center_x, et.y - center_y, target_level_id)
+#
+# each screen's play area is cut into CELL_SIZE cells; a cell is free when e.t. can stand
+# anywhere in it without touching a pit. e.t. runs (1 point a frame, less than a cell a
+# frame, both axes at once), so routes are counted in cells crossed and turned into points
+# at the end. routes never go through a pit: a screen entered on a pit is a dead end.
+import heapq
+import numpy as np
+from batch_simulation import ET_WIDTH, IDLE_HEIGHT, BOOST_SPEED, STEP_COST
+from collision_grid import PitGrid
+from graphics import CENTER_WIDTH, CENTER_HEIGHT
+from controls import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_DOWN, INPUT_SPACE
+from level_data import DIRECTION_IDS, NO_LEVEL
+from level_manager import LevelManager
+
+CELL_SIZE = 6  # more than e.t. runs in a frame, so a frame never skips a cell
+UNREACHABLE = 1 << 24  # distance of cells with no route (in cells)
+
+# screen edges, in level_data direction order
+EDGES = ("right", "left", "up", "down")
+
+# moves between neighbouring cells: (row step, column step, input bits), running
+MOVES = (
+    (0, 1, INPUT_RIGHT | INPUT_SPACE),
+    (0, -1, INPUT_LEFT | INPUT_SPACE),
+    (-1, 0, INPUT_UP | INPUT_SPACE),
+    (1, 0, INPUT_DOWN | INPUT_SPACE),
+    (-1, 1, INPUT_UP | INPUT_RIGHT | INPUT_SPACE),
+    (-1, -1, INPUT_UP | INPUT_LEFT | INPUT_SPACE),
+    (1, 1, INPUT_DOWN | INPUT_RIGHT | INPUT_SPACE),
+    (1, -1, INPUT_DOWN | INPUT_LEFT | INPUT_SPACE),
+)
+# input bits that take e.t. through each edge
+EDGE_MOVES = (INPUT_RIGHT | INPUT_SPACE, INPUT_LEFT | INPUT_SPACE, INPUT_UP | INPUT_SPACE, INPUT_DOWN | INPUT_SPACE)
+_MOVE_BITS = np.array([bits for row_step, column_step, bits in MOVES], dtype=np.uint8)
+_EDGE_MOVE_BITS = np.array(EDGE_MOVES, dtype=np.uint8)
+
+# e.t. positions on a screen (top left corner, play area coordinates) before it crosses an edge
+COLUMNS = (CENTER_WIDTH - ET_WIDTH) // CELL_SIZE + 1
+ROWS = (CENTER_HEIGHT - IDLE_HEIGHT) // CELL_SIZE + 1
+
+# compiled screen grids, keyed by the screen's pit rects
+_screen_grid_cache = {}
+# route planners, keyed by level table
+_planner_cache = {}
+
+
+def cells_to_points(cells):
+    """returns the counter points of a route crossing a number of cells (arrays too)"""
+    return np.ceil(np.asarray(cells) * CELL_SIZE / BOOST_SPEED).astype(np.int32) * STEP_COST
+
+
+def get_cell(x, y):
+    """returns the (row, column) of the cell of an e.t. position (play area coordinates)"""
+    row = int(y) // CELL_SIZE
+    column = int(x) // CELL_SIZE
+    row = 0 if row < 0 else ROWS - 1 if row >= ROWS else row
+    column = 0 if column < 0 else COLUMNS - 1 if column >= COLUMNS else column
+    return row, column
+
+
+def _shifted(array, row_step, column_step, fill):
+    # out[row, column] = array[row + row_step, column + column_step], fill past the edges
+    padded = np.full((array.shape[0] + 2, array.shape[1] + 2), fill, dtype=array.dtype)
+    padded[1:-1, 1:-1] = array
+    return padded[1 + row_step:1 + row_step + array.shape[0], 1 + column_step:1 + column_step + array.shape[1]]
+
+
+class ScreenGrid:
+    """the free cells of a screen and the distance (in cells) from every cell to each edge"""
+
+    def __init__(self, pit_rects):
+        self.pit_grid = PitGrid.for_rects(pit_rects)
+        x, y = np.meshgrid(np.arange(COLUMNS) * CELL_SIZE, np.arange(ROWS) * CELL_SIZE)
+        self.free = ~self.pit_grid.overlaps_batch(x, y, ET_WIDTH + CELL_SIZE, IDLE_HEIGHT + CELL_SIZE)
+
+        # links[move][cell]: e.t. can make the move from the cell (into a free cell,
+        # diagonally only between two free cells)
+        self.links = np.empty((len(MOVES),) + self.free.shape, dtype=bool)
+        for move, (row_step, column_step, bits) in enumerate(MOVES):
+            link = _shifted(self.free, row_step, column_step, False).copy()
+            if row_step and column_step:
+                link &= _shifted(self.free, row_step, 0, False)
+                link &= _shifted(self.free, 0, column_step, False)
+            self.links[move] = link
+
+        goals = np.zeros((len(EDGES),) + self.free.shape, dtype=bool)
+        goals[DIRECTION_IDS["right"], :, -1] = True
+        goals[DIRECTION_IDS["left"], :, 0] = True
+        goals[DIRECTION_IDS["up"], 0, :] = True
+        goals[DIRECTION_IDS["down"], -1, :] = True
+        self.edge_distances = np.stack([self.get_distances(goal) for goal in goals])
+
+    @classmethod
+    def for_rects(cls, pit_rects):
+        """returns the grid of a list of pit rects, compiled once per layout"""
+        key = tuple(tuple(rect) for rect in pit_rects)
+        grid = _screen_grid_cache.get(key)
+        if grid is None:
+            grid = _screen_grid_cache[key] = cls(key)
+        return grid
+
+    def get_distances(self, goal):
+        """returns the distance in cells from every cell to the nearest free goal cell.
+
+        a wavefront grown one cell at a time through free cells; cells that are not free
+        (part of them touches a pit) get one more than their best free neighbour.
+        """
+        distances = np.full(self.free.shape, UNREACHABLE, dtype=np.int32)
+        reached = goal & self.free
+        frontier = reached
+        distance = 0
+        while frontier.any():
+            distances[frontier] = distance
+            distance += 1
+            grown = np.zeros_like(frontier)
+            for move, (row_step, column_step, bits) in enumerate(MOVES):
+                # a cell is reached when one of its moves leads into the frontier
+                grown |= _shifted(frontier, row_step, column_step, False) & self.links[move]
+            frontier = grown & self.free & ~reached
+            reached |= frontier
+
+        blocked = ~self.free
+        distances[blocked] = np.minimum(self.get_best_neighbours(distances)[0] + 1, UNREACHABLE)[blocked]
+        return distances
+
+    def get_best_neighbours(self, distances):
+        """returns (distance, move) of the closest cell each cell can move to"""
+        neighbours = np.stack([np.where(self.links[move], _shifted(distances, row_step, column_step, UNREACHABLE), UNREACHABLE)
+                               for move, (row_step, column_step, bits) in enumerate(MOVES)])
+        moves = neighbours.argmin(axis=0)
+        return np.take_along_axis(neighbours, moves[None], axis=0)[0], moves
+
+    def is_safe(self, x, y):
+        """returns True if e.t. standing at (x, y) touches no pit"""
+        return not self.pit_grid.overlaps(x, y, ET_WIDTH, IDLE_HEIGHT)
+
+
+class RoutePlanner:
+    """cheapest routes between the screens of a level table, as lookup tables.
+
+    screens are entered by an edge (the direction e.t. was walking, see
+    LevelManager.get_spawn_position), which fixes where e.t. starts on them. costs are
+    counter points, -1 where there is no route:
+
+    - edge_costs[level, entry, exit]: crossing a screen from an entry edge to an exit edge
+    - screen_costs[level, entry, target]: from entering a screen to reaching another one
+    - next_moves[level, target, row, column]: input bits that take e.t. from a cell
+      towards the target screen the cheapest way (0 on the target or with no route)
+    - costs[level, target, row, column]: points left to reach the target from a cell
+    """
+
+    def __init__(self, level_table):
+        self.table = level_table
+        level_count = len(level_table.names)
+        edge_count = len(EDGES)
+        self.grids = tuple(ScreenGrid.for_rects(rects) for rects in level_table.level_pit_rects)
+
+        # where e.t. starts on a screen for each entry edge, and whether it falls right away
+        level_manager = LevelManager(level_table)
+        spawns = [level_manager.get_spawn_position(edge, 0, 0, CENTER_WIDTH, CENTER_HEIGHT, ET_WIDTH, IDLE_HEIGHT)
+                  for edge in EDGES]
+        self.entry_cells = tuple(get_cell(x, y) for x, y in spawns)
+        self.entry_safe = np.array([[grid.is_safe(x, y) for x, y in spawns] for grid in self.grids], dtype=bool)
+
+        # crossing each screen, in cells (one more to step over the exit edge)
+        edge_cells = np.full((level_count, edge_count, edge_count), UNREACHABLE, dtype=np.int32)
+        for level_id, grid in enumerate(self.grids):
+            for entry, (row, column) in enumerate(self.entry_cells):
+                if not self.entry_safe[level_id, entry]:
+                    continue
+                for exit_edge in range(edge_count):
+                    if level_table.adjacency[level_id][exit_edge] != NO_LEVEL:
+                        edge_cells[level_id, entry, exit_edge] = min(grid.edge_distances[exit_edge, row, column] + 1, UNREACHABLE)
+
+        # cells from entering each screen to reaching each target (dijkstra from the target back)
+        screen_cells = np.full((level_count, edge_count, level_count), UNREACHABLE, dtype=np.int32)
+        for target_id in range(level_count):
+            screen_cells[:, :, target_id] = self._get_cells_to(target_id, edge_cells)
+
+        # per-cell tables for every (screen, target) pair
+        self.costs = np.full((level_count, level_count, ROWS, COLUMNS), -1, dtype=np.int32)
+        self.next_moves = np.zeros((level_count, level_count, ROWS, COLUMNS), dtype=np.uint8)
+        for level_id, grid in enumerate(self.grids):
+            for target_id in range(level_count):
+                if target_id == level_id:
+                    self.costs[level_id, target_id] = 0
+                    continue
+                self._fill_cell_tables(level_id, target_id, grid, screen_cells)
+
+        self.edge_costs = np.where(edge_cells < UNREACHABLE, cells_to_points(edge_cells), -1)
+        self.screen_costs = np.where(screen_cells < UNREACHABLE, cells_to_points(screen_cells), -1)
+
+    @classmethod
+    def for_table(cls, level_table):
+        """returns the planner of a level table, worked out once per table"""
+        planner = _planner_cache.get(level_table)
+        if planner is None:
+            planner = _planner_cache[level_table] = cls(level_table)
+        return planner
+
+    def _get_cells_to(self, target_id, edge_cells):
+        # returns [level, entry] cells to reach the target, from every way into every screen
+        level_count, edge_count = edge_cells.shape[:2]
+        adjacency = self.table.adjacency
+        cells = np.full((level_count, edge_count), UNREACHABLE, dtype=np.int64)
+        cells[target_id] = 0
+        queue = [(0, target_id, entry) for entry in range(edge_count)]
+        while queue:
+            distance, level_id, entry = heapq.heappop(queue)
+            if distance > cells[level_id, entry]:
+                continue
+            # every screen crossing that enters this screen by this edge
+            for previous_id in range(level_count):
+                if adjacency[previous_id][entry] != level_id or previous_id == target_id:
+                    continue
+                for previous_entry in range(edge_count):
+                    crossing = edge_cells[previous_id, previous_entry, entry]
+                    if crossing >= UNREACHABLE or not self.entry_safe[level_id, entry]:
+                        continue
+                    previous_distance = distance + crossing
+                    if previous_distance < cells[previous_id, previous_entry]:
+                        cells[previous_id, previous_entry] = previous_distance
+                        heapq.heappush(queue, (previous_distance, previous_id, previous_entry))
+        return np.minimum(cells, UNREACHABLE)
+
+    def _fill_cell_tables(self, level_id, target_id, grid, screen_cells):
+        # cells to the target from every cell of a screen: the best exit edge, then the rest of the route
+        best = np.full(grid.free.shape, UNREACHABLE, dtype=np.int64)
+        best_edge = np.zeros(grid.free.shape, dtype=np.intp)
+        for exit_edge in range(len(EDGES)):
+            next_level_id = self.table.adjacency[level_id][exit_edge]
+            if next_level_id == NO_LEVEL or not self.entry_safe[next_level_id, exit_edge]:
+                continue
+            onward = screen_cells[next_level_id, exit_edge, target_id]
+            if onward >= UNREACHABLE:
+                continue
+            distances = grid.edge_distances[exit_edge]
+            through_edge = np.where(distances < UNREACHABLE, distances + 1 + onward, UNREACHABLE)
+            better = through_edge < best
+            best[better] = through_edge[better]
+            best_edge[better] = exit_edge
+        best = np.minimum(best, UNREACHABLE).astype(np.int32)
+
+        # step over the edge from its goal cells, otherwise towards the closest neighbour
+        neighbour_distances, moves = grid.get_best_neighbours(best)
+        at_edge = np.take_along_axis(grid.edge_distances, best_edge[None], axis=0)[0] == 0
+        next_moves = np.where(at_edge, _EDGE_MOVE_BITS[best_edge], _MOVE_BITS[moves])
+        reachable = best < UNREACHABLE
+        self.next_moves[level_id, target_id] = np.where(reachable, next_moves, 0)
+        self.costs[level_id, target_id] = np.where(reachable, cells_to_points(best), -1)
+
+    def get_next_move(self, level_id, x, y, target_level_id):
+        """returns the input bits that take e.t. (play area coordinates) towards a screen"""
+        row, column = get_cell(x, y)
+        return int(self.next_moves[level_id, target_level_id, row, column])
+
+    def get_cost(self, level_id, x, y, target_level_id):
+        """returns the points left to reach a screen from a position, or None with no route"""
+        row, column = get_cell(x, y)
+        cost = int(self.costs[level_id, target_level_id, row, column])
+        return None if cost < 0 else cost
@@ -0,0 +1,393 @@
+# simulation.py
+import pygame
+from graphics import get_center_area, SCREEN_WIDTH, SCREEN_HEIGHT, LIGHT_BLUE2_HEIGHT
+from controls import keys_from_bits, INPUT_SPACE_PRESSED
+from sprite_atlas import FACING_LEFT, FACING_RIGHT
+from player import ET, STATE_ESCAPED_PIT_MOVING
+from spaceship import Spaceship
+from counter import Counter
+from game_state_manager import GameStateManager
+from level_manager import LevelManager
+from collision_grid import rects_overlap
+from audio_manager import AudioManager
+from debug_log import debug_log
+from render_queue import RenderQueue
+from snapshot import take_snapshot, restore_snapshot
+from frame_profiler import profiler, PHASE_HANDLE_INPUT, PHASE_LEVEL_CHECKS, PHASE_RENDER, PHASE_COUNTER
+
+class Simulation:
+    """the game logic, one frame per step, with no display, mixer or frame cap required.
+
+    pass a screen (window or offscreen surface) to be able to render(),
+    and an AudioManager to hear the game; without them the game runs headless.
+    with pixel_collisions, pits are tested against e.t.'s drawn pixels (masks) rather than
+    his image rect and its hand-tuned margins; BatchSimulation follows the rect rules.
+    """
+
+    def __init__(self, screen=None, audio_manager=None, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 pixel_collisions=False):
+        self.screen = screen
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        # pits hit by e.t.'s pixels (sprite and pit masks) instead of his image rect
+        self.pixel_collisions = pixel_collisions
+
+        # initialize managers
+        self.game_state_manager = GameStateManager(screen, screen_width, screen_height)
+        self.level_manager = LevelManager(pixel_collisions=pixel_collisions)
+        self.audio_manager = audio_manager if audio_manager is not None else AudioManager(headless=True)
+
+        # load instances
+        self.et = ET((screen_width - 48) // 2, (screen_height - 48) // 2,
+                     self.audio_manager.get_sound("et_head_raise"))
+        self.et.set_levitation_sound(self.audio_manager.get_sound("et_head_raise_levitating"))
+
+        self.spaceship = Spaceship((screen_width - 96) // 2, 100)
+        self.counter = Counter()
+
+        # number of frames stepped since the last reset
+        self.frame = 0
+        # blits of the frame being drawn (see render)
+        self.render_queue = RenderQueue()
+
+    def reset(self, skip_intro=False):
+        """starts a new game on FOREST1, as if SPACE was pressed on the title screen.
+
+        with skip_intro, the spaceship intro is stepped through (no input)
+        and E.T. is controllable when this returns.
+        """
+        self.game_state_manager.reset()
+        self.level_manager.reset()
+        self.audio_manager.stop_music()
+        self.et.reset_for_new_game((self.screen_width - 48) // 2, (self.screen_height - 48) // 2)
+        self.frame = 0
+        self.start_game()
+
+        if skip_intro:
+            while self.game_state_manager.is_intro_active():
+                self.step(0)
+            self.frame = 0
+
+    def start_game(self):
+        """leaves the title screen and starts the spaceship intro on FOREST1"""
+        self.game_state_manager.change_state("FOREST1")
+        self.level_manager.set_level("FOREST1")
+        self.audio_manager.stop_music()
+
+        # reset and activate counter for new game
+        self.counter.reset()
+        self.counter.activate()
+        self.game_state_manager.set_game_over(False)
+
+        # play spaceship sound
+        self.audio_manager.play_sound("spaceship")
+
+        # initialize the intro sequence with the spaceship
+        self.game_state_manager.set_intro_active(True)
+        center_x, center_y, center_width, center_height = get_center_area(self.screen_width, "FOREST1")
+        self.spaceship.reset_for_new_game(center_x + (center_width - 96) // 2, center_y)
+
+        # initial position of e.t. in the ship
+        self.et.x, self.et.y = self.spaceship.get_et_position()
+
+    def snapshot(self):
+        """returns the whole game state as a fixed-layout bytes blob (see snapshot.py)"""
+        return take_snapshot(self)
+
+    def restore(self, data):
+        """puts the game back in the state of a snapshot() blob"""
+        restore_snapshot(self, data)
+
+    def step(self, input_bits):
+        """advances the game by one frame and returns the list of events that happened.
+
+        events are the ET.handle_input results ("STEP", "HEAD_RAISE", "FALL_COMPLETE",
+        "ESCAPE_PIT") plus "GAME_START", "PIT_FALL", "LEVEL_CHANGE" and "GAME_OVER".
+        """
+        keys = keys_from_bits(input_bits)
+        space_pressed_once = bool(input_bits & INPUT_SPACE_PRESSED)
+        events = []
+        self.frame += 1
+
+        current_state = self.game_state_manager.get_current_state()
+
+        if current_state == "TITLE":
+            # deactivate counter on title screen
+            self.counter.deactivate()
+
+            # start music when entering title screen
+            if not self.audio_manager.is_music_playing():
+                self.audio_manager.play_music("title")
+
+            # start game when space is pressed
+            if keys[pygame.K_SPACE]:
+                self.start_game()
+                events.append("GAME_START")
+
+        elif current_state == "FOREST1" and self.game_state_manager.is_intro_active():
+            self._step_intro(keys, space_pressed_once, events)
+
+        elif current_state == "PIT":
+            self._step_pit(keys, space_pressed_once, events)
+
+        else:
+            self._step_level(current_state, keys, space_pressed_once, events)
+
+        # e.t.'s walk/run loop, silent once the game is over
+        movement_loop = self.et.movement_loop
+        if movement_loop is None or self.game_state_manager.is_game_over():
+            self.audio_manager.update_loops()
+        else:
+            self.audio_manager.update_loops((movement_loop,))
+
+        if profiler.active:
+            profiler.mark(PHASE_LEVEL_CHECKS)
+        return events
+
+    def _apply_result(self, result, events):
+        # handle counter decrements for an ET.handle_input result
+        if result is None:
+            return
+        events.append(result)
+        if result == "STEP":
+            game_over = self.counter.decrement_step()
+        elif result == "HEAD_RAISE":
+            game_over = self.counter.decrement_head_raise()
+        elif result == "FALL_COMPLETE":
+            game_over = self.counter.decrement_fall()
+        else:
+            return
+        self.game_state_manager.set_game_over(game_over)
+        if game_over:
+            events.append("GAME_OVER")
+
+    def _step_intro(self, keys, space_pressed_once, events):
+        # forest1 screen - handle intro sequence
+        et = self.et
+        spaceship = self.spaceship
+        center_x, center_y, center_width, center_height = get_center_area(self.screen_width, "FOREST1")
+
+        # manage spaceship intro sequence
+        spaceship.update(center_y)
+
+        # if e.t. is still in spaceship
+        if spaceship.is_et_in_spaceship():
+            # e.t. follows spaceship
+            et.x, et.y = spaceship.get_et_position()
+
+            # e.t. can only look right/left during descent (look left by default)
+            et.image = et.atlas.get("idle", 0, FACING_RIGHT if keys[pygame.K_RIGHT] else FACING_LEFT)
+            return
+
+        # e.t. has been dropped, wait for spaceship to disappear
+        if not spaceship.is_visible():
+            self.game_state_manager.set_intro_active(False)
+            # e.t. becomes controllable only when the ship has completely disappeared
+            et.set_controllable(True)
+
+        # e.t. can now be controlled normally
+        if not self.game_state_manager.is_game_over():
+            self._apply_result(et.handle_input(keys, space_pressed_once), events)
+            if profiler.active:
+                profiler.mark(PHASE_HANDLE_INPUT)
+
+    def _step_pit(self, keys, space_pressed_once, events):
+        # pit screen - e.t. can levitate to escape
+        if self.game_state_manager.is_game_over():
+            return
+
+        et = self.et
+        level_manager = self.level_manager
+        result = et.handle_input(keys, space_pressed_once)
+        self._apply_result(result, events)
+        if profiler.active:
+            profiler.mark(PHASE_HANDLE_INPUT)
+
+        if result == "ESCAPE_PIT":
+            # return to the level specified in level manager
+            escape_level = level_manager.get_pit_escape_level()
+            if escape_level:
+                self.game_state_manager.change_state(escape_level)
+                level_manager.set_level(escape_level)
+                # position e.t. centered on the pit he fell from
+                center_x, center_y, center_width, center_height = get_center_area(self.screen_width, escape_level)
+                et.x, et.y = level_manager.get_pit_center_position(center_x, center_y, et.image.get_width(), et.image.get_height())
+                # start escaped pit moving state
+                et.start_finish_head_raise()
+                events.append("LEVEL_CHANGE")
+
+    def _step_level(self, current_state, keys, space_pressed_once, events):
+        # all other game states (forest1 normal gameplay, forest2, forest3, forest4, forest5, building, house)
+        if self.game_state_manager.is_game_over():
+            return
+
+        et = self.et
+        level_manager = self.level_manager
+        center_x, center_y, center_width, center_height = get_center_area(self.screen_width, current_state)
+
+        self._apply_result(et.handle_input(keys, space_pressed_once), events)
+        if profiler.active:
+            profiler.mark(PHASE_HANDLE_INPUT)
+
+        # check if ET escaped from pit collision and can finish head raise animation
+        if et.state == STATE_ESCAPED_PIT_MOVING:
+            self._check_pit_escape_clearance(center_x, center_y)
+        else:
+            # check if ET stepped on a pit (only when NOT in the escaped pit moving state)
+            et_x, et_y, et_mask = et.x, et.y, None
+            if self.pixel_collisions:
+                # the frame's pixels, where it is drawn
+                (et_x, et_y), et_mask = et.get_draw_position(), et.get_mask()
+            if level_manager.has_pit_at_position(
+                et_x - center_x, et_y - center_y,
+                et.image.get_width(), et.image.get_height(), et_mask
+            ):
+                self.game_state_manager.change_state("PIT", et=et)
+                level_manager.set_level("PIT")
+                et.setup_pit_fall(center_x, center_y, center_width, center_height)
+                self.audio_manager.play_sound("et_fall")
+                events.append("PIT_FALL")
+
+        # general level transition system for other levels
+        transition = level_manager.check_level_boundaries(
+            et.x, et.y, et.image.get_width(), et.image.get_height(),
+            center_x, center_y, center_width, center_height
+        )
+
+        if transition:
+            if level_manager.change_level(transition):
+                new_level = level_manager.get_current_level()
+                self.game_state_manager.change_state(new_level)
+
+                # position e.t. according to the direction he came from
+                spawn_x, spawn_y = level_manager.get_spawn_position(
+                    transition, center_x, center_y, center_width, center_height,
+                    et.image.get_width(), et.image.get_height()
+                )
+                et.reset_for_level_transition(spawn_x, spawn_y)
+                events.append("LEVEL_CHANGE")
+
+    def _check_pit_escape_clearance(self, center_x, center_y):
+        # ET escaped from the pit but stays in head_raise_3 until his hitbox is clear of it
+        et = self.et
+        if self.pixel_collisions:
+            # clear once no pixel of the frame covers a pixel of the pit
+            draw_x, draw_y = et.get_draw_position()
+            pit_collision = self.level_manager.touches_current_pit(et.get_mask(), draw_x - center_x, draw_y - center_y)
+            if debug_log.enabled:
+                debug_log.record("pit_escape_check", frame=self.frame, position=(draw_x - center_x, draw_y - center_y),
+                                 pit_collision=pit_collision)
+            all_clear = not pit_collision
+        else:
+            all_clear = self._is_hitbox_clear_of_pit(center_x, center_y)
+
+        if all_clear:
+            # ET is completely clear of pit collision: the head lowers, the levitation sound stops
+            et.finish_pit_escape()
+
+    def _is_hitbox_clear_of_pit(self, center_x, center_y):
+        # rect test: ET's image rect, with margins that make up for the changing frame heights
+        et = self.et
+        level_manager = self.level_manager
+
+        # get ET's current dimensions (height changes during animation)
+        et_rect_x = et.x - center_x
+        et_rect_y = et.y - center_y
+        et_width = et.image.get_width()
+        et_height = et.image.get_height()
+
+        # check if ET's actual hitbox is completely clear of pit collision
+        # separate margins for each direction - adjust these values to fine-tune pit escape
+        margin_left = 0    # increase to need more clearance on left side
+        margin_right = 0   # increase to need more clearance on right side
+        margin_top = 1     # increase to need more clearance above et
+        margin_bottom = 16 # increase to need more clearance below et (compensates for height changes)
+
+        # detect which direction ET escaped from pit
+        escaped_upward = et.y < center_y + 180
+        escaped_downward = et.y > center_y + 180
+        if level_manager.current_pit_bounds:
+            pit_x, pit_y, pit_width, pit_height = level_manager.current_pit_bounds
+            escaped_upward = (et_rect_y + et_height) <= pit_y + 1
+            escaped_downward = et_rect_y > (pit_y + pit_height)
+
+        if escaped_upward:
+            # for upward escape, we test from et's head
+            test_y = et_rect_y + et_height
+            test_height = 1
+        elif escaped_downward:
+            # escaped by going down - test ET's head clearance
+            test_y = et_rect_y
+            test_height = margin_bottom
+        else:
+            # escaped sideways - test full hitbox
+            test_y = et_rect_y - margin_top
+            test_height = et_height + margin_top + margin_bottom
+
+        expanded_hitbox = (
+            et_rect_x - margin_left,
+            test_y,
+            et_width + margin_left + margin_right,
+            test_height
+        )
+
+        # test against the pit ET escaped from only (not has_pit_at_position)
+        pit_collision = bool(level_manager.current_pit_bounds) and rects_overlap(expanded_hitbox, level_manager.current_pit_bounds)
+
+        all_clear = not pit_collision
+
+        if debug_log.enabled:
+            debug_log.record("pit_escape_check", frame=self.frame, hitbox=expanded_hitbox, pit_collision=pit_collision)
+
+        if all_clear and debug_log.enabled:
+            # where exactly et stops
+            debug_log.record("pit_escape_clear", frame=self.frame, et_x=et.x, et_y=et.y,
+                             et_rect=(et_rect_x, et_rect_y, et_width, et_height),
+                             escaped_upward=escaped_upward, escaped_downward=escaped_downward,
+                             pit_bounds=level_manager.current_pit_bounds)
+        return all_clear
+
+    def render(self):
+        """draws the current frame on the screen given at construction"""
+        game_state_manager = self.game_state_manager
+        queue = self.render_queue
+
+        # the screen's static layers (composed once per screen), then the sprites over them
+        queue.add(game_state_manager.get_backdrop(game_state_manager.get_current_state()), (0, 0))
+        queue.extend(self.get_sprite_blits())
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+        counter_blit = self.get_counter_blit()
+        if counter_blit is not None:
+            queue.add(*counter_blit)
+        if profiler.active:
+            profiler.mark(PHASE_COUNTER)
+
+        # the whole frame in one call
+        queue.draw(self.screen)
+        if profiler.active:
+            profiler.mark(PHASE_RENDER)
+
+    def get_sprite_blits(self):
+        """returns the (surface, dest, area) blits of e.t. and the spaceship, in drawing order"""
+        game_state_manager = self.game_state_manager
+        current_state = game_state_manager.get_current_state()
+        blits = []
+
+        if current_state != "TITLE":
+            intro_active = current_state == "FOREST1" and game_state_manager.is_intro_active()
+            if intro_active:
+                blits.append(self.spaceship.get_blit())
+
+            # always draw e.t.
+            blits.append(self.et.get_blit(self.spaceship if intro_active else None))
+
+        return [blit for blit in blits if blit is not None]
+
+    def get_counter_blit(self):
+        """returns the blit of the counter (only appears in game screens, not title), or None"""
+        return self.counter.get_blit(self.screen_width, self.screen_height, LIGHT_BLUE2_HEIGHT)
+
+    def get_counter_rect(self):
+        """returns the screen area of the counter"""
+        return self.counter.get_rect(self.screen_width, self.screen_height, LIGHT_BLUE2_HEIGHT)
@@ -0,0 +1,230 @@
+# snapshot.py
+#
+# the whole game state of a Simulation as a fixed-layout bytes blob (struct), for save
+# states, rewind and search. sprites and sounds are not saved: images are stored as
+# their number in the sprite atlas, names (screens, levels, music) as small integers.
+import struct
+from audio_manager import MUSIC_FILES
+from player import ETState
+
+SNAPSHOT_VERSION = 3
+
+SPACESHIP_STATES = ("DESCENDING", "ASCENDING", "HIDDEN")
+MOVEMENT_LOOPS = (None, "et_walk", "et_run")
+MUSIC_NAMES = (None,) + tuple(MUSIC_FILES)
+
+# (field name, struct format), in blob order
+_FIELDS = (
+    ("version", "H"),
+    ("frame", "I"),
+    # game state manager (screens: 0 none, 1 title, then level ids + 2)
+    ("current_state", "B"),
+    ("previous_state", "B"),
+    ("intro_sequence_active", "?"),
+    ("game_over", "?"),
+    # audio manager
+    ("current_music", "B"),
+    ("music_playing", "?"),
+    # level manager (levels: level ids, -1 for none)
+    ("current_level", "b"),
+    ("pit_escape_level", "b"),
+    ("has_pit_bounds", "?"),
+    ("pit_x", "i"),
+    ("pit_y", "i"),
+    ("pit_width", "i"),
+    ("pit_height", "i"),
+    # counter
+    ("counter_value", "i"),
+    ("counter_active", "?"),
+    # spaceship
+    ("spaceship_x", "d"),
+    ("spaceship_y", "d"),
+    ("spaceship_start_y", "d"),
+    ("spaceship_target_y_for_drop", "d"),
+    ("spaceship_frame", "B"),
+    ("spaceship_counter", "B"),
+    ("spaceship_image", "B"),
+    ("spaceship_state", "B"),
+    ("spaceship_et_dropped", "?"),
+    # e.t.
+    ("x", "d"),
+    ("y", "d"),
+    ("image", "H"),
+    ("walk_frame", "B"),
+    ("walk_counter", "B"),
+    ("walk_anim_speed", "B"),
+    ("moving", "?"),
+    ("is_running", "?"),
+    ("movement_loop", "B"),
+    ("state", "B"),
+    ("head_raise_frame", "b"),
+    ("head_raise_counter", "b"),
+    ("head_raise_just_started", "?"),
+    ("pit_target_y", "d"),
+    ("pit_left_limit", "d"),
+    ("pit_right_limit", "d"),
+    ("pit_bottom_y", "d"),
+    ("pit_escape_y", "d"),
+    ("finish_frame", "b"),
+    ("finish_counter", "b"),
+    ("levitation_sound_timer", "H"),
+)
+
+FIELD_NAMES = tuple(name for name, field_format in _FIELDS)
+SNAPSHOT = struct.Struct("<" + "".join(field_format for name, field_format in _FIELDS))
+SNAPSHOT_SIZE = SNAPSHOT.size
+
+
+def _state_code(level_ids, state):
+    if state is None:
+        return 0
+    if state == "TITLE":
+        return 1
+    return level_ids[state] + 2
+
+
+def _state_name(level_names, code):
+    if code == 0:
+        return None
+    if code == 1:
+        return "TITLE"
+    return level_names[code - 2]
+
+
+def take_snapshot(simulation):
+    """returns the game state of a simulation as SNAPSHOT_SIZE bytes"""
+    game_state_manager = simulation.game_state_manager
+    level_manager = simulation.level_manager
+    audio_manager = simulation.audio_manager
+    counter = simulation.counter
+    spaceship = simulation.spaceship
+    et = simulation.et
+    level_ids = level_manager.table.ids
+    pit_bounds = level_manager.current_pit_bounds
+
+    return SNAPSHOT.pack(
+        SNAPSHOT_VERSION,
+        simulation.frame,
+        _state_code(level_ids, game_state_manager.current_state),
+        _state_code(level_ids, game_state_manager.previous_state),
+        game_state_manager.intro_sequence_active,
+        game_state_manager.game_over,
+        MUSIC_NAMES.index(audio_manager.current_music),
+        audio_manager.music_playing,
+        level_manager.current_level_id,
+        level_ids[level_manager.pit_escape_level] if level_manager.pit_escape_level else -1,
+        pit_bounds is not None,
+        *(pit_bounds or (0, 0, 0, 0)),
+        counter.value,
+        counter.is_active,
+        spaceship.x,
+        spaceship.y,
+        spaceship.start_y,
+        spaceship.target_y_for_drop,
+        spaceship.frame,
+        spaceship.counter,
+        spaceship.atlas.index_of(spaceship.image),
+        SPACESHIP_STATES.index(spaceship.state),
+        spaceship.et_dropped,
+        et.x,
+        et.y,
+        et.atlas.index_of(et.image),
+        et.walk_frame,
+        et.walk_counter,
+        et.walk_anim_speed,
+        et.moving,
+        et.is_running,
+        MOVEMENT_LOOPS.index(et.movement_loop),
+        et.state,
+        et.head_raise_frame,
+        et.head_raise_counter,
+        et.head_raise_just_started,
+        et.pit_target_y,
+        et.pit_left_limit,
+        et.pit_right_limit,
+        et.pit_bottom_y,
+        et.pit_escape_y,
+        et.finish_frame,
+        et.finish_counter,
+        et.levitation_sound_timer,
+    )
+
+
+def restore_snapshot(simulation, data):
+    """puts a simulation back in the game state of a snapshot"""
+    (version, frame,
+     current_state, previous_state, intro_sequence_active, game_over,
+     current_music, music_playing,
+     current_level, pit_escape_level, has_pit_bounds, pit_x, pit_y, pit_width, pit_height,
+     counter_value, counter_active,
+     spaceship_x, spaceship_y, spaceship_start_y, spaceship_target_y_for_drop,
+     spaceship_frame, spaceship_counter, spaceship_image, spaceship_state, spaceship_et_dropped,
+     x, y, image,
+     walk_frame, walk_counter, walk_anim_speed, moving, is_running, movement_loop, state,
+     head_raise_frame, head_raise_counter, head_raise_just_started,
+     pit_target_y, pit_left_limit, pit_right_limit, pit_bottom_y,
+     pit_escape_y, finish_frame, finish_counter, levitation_sound_timer) = SNAPSHOT.unpack(data)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+
+    simulation.frame = frame
+
+    game_state_manager = simulation.game_state_manager
+    level_manager = simulation.level_manager
+    level_names = level_manager.table.names
+    game_state_manager.current_state = _state_name(level_names, current_state)
+    game_state_manager.previous_state = _state_name(level_names, previous_state)
+    game_state_manager.intro_sequence_active = intro_sequence_active
+    game_state_manager.game_over = game_over
+
+    # restart or stop the music only when it differs
+    audio_manager = simulation.audio_manager
+    music = MUSIC_NAMES[current_music]
+    if audio_manager.current_music != music:
+        audio_manager.stop_music()
+        if music is not None:
+            audio_manager.play_music(music)
+    audio_manager.music_playing = music_playing
+
+    level_manager.current_level_id = current_level
+    level_manager.current_level = level_names[current_level]
+    level_manager.pit_escape_level = level_names[pit_escape_level] if pit_escape_level >= 0 else None
+    level_manager.current_pit_bounds = (pit_x, pit_y, pit_width, pit_height) if has_pit_bounds else None
+
+    counter = simulation.counter
+    counter.value = counter_value
+    counter.is_active = counter_active
+
+    spaceship = simulation.spaceship
+    spaceship.x = spaceship_x
+    spaceship.y = spaceship_y
+    spaceship.start_y = spaceship_start_y
+    spaceship.target_y_for_drop = spaceship_target_y_for_drop
+    spaceship.frame = spaceship_frame
+    spaceship.counter = spaceship_counter
+    spaceship.image = spaceship.atlas.surfaces[spaceship_image]
+    spaceship.state = SPACESHIP_STATES[spaceship_state]
+    spaceship.et_dropped = spaceship_et_dropped
+
+    et = simulation.et
+    et.x = x
+    et.y = y
+    et.image = et.atlas.surfaces[image]
+    et.walk_frame = walk_frame
+    et.walk_counter = walk_counter
+    et.walk_anim_speed = walk_anim_speed
+    et.moving = moving
+    et.is_running = is_running
+    et.movement_loop = MOVEMENT_LOOPS[movement_loop]
+    et.state = ETState(state)
+    et.head_raise_frame = head_raise_frame
+    et.head_raise_counter = head_raise_counter
+    et.head_raise_just_started = head_raise_just_started
+    et.pit_target_y = pit_target_y
+    et.pit_left_limit = pit_left_limit
+    et.pit_right_limit = pit_right_limit
+    et.pit_bottom_y = pit_bottom_y
+    et.pit_escape_y = pit_escape_y
+    et.finish_frame = finish_frame
+    et.finish_counter = finish_counter
+    et.levitation_sound_timer = levitation_sound_timer
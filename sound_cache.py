@@ -0,0 +1,109 @@
+# sound_cache.py
+#
+# sounds converted to the mixer's exact format (rate, sample format, channels) with
+# numpy and pygame.sndarray, so SDL never resamples them. conversions are cached on disk,
+# one directory per mixer format, and are redone when the source file changes.
+import os
+import wave
+import numpy as np
+import pygame
+
+SOUND_CACHE_DIR = "assets/sound_cache"
+
+# numpy sample types for pygame.mixer.get_init() sizes (pygame 2 reports its 32 bit
+# float mixers as -32, and cannot open signed 32 bit integer ones)
+_SAMPLE_TYPES = {
+    8: np.uint8,
+    -8: np.int8,
+    16: np.uint16,
+    -16: np.int16,
+    32: np.float32,
+    -32: np.float32,
+}
+
+# wav sample widths (bytes) to numpy sample types
+_WAV_SAMPLE_TYPES = {
+    1: np.uint8,
+    2: np.int16,
+    4: np.int32,
+}
+
+
+def _to_float(samples):
+    # integer samples of any type to floats in [-1, 1)
+    if samples.dtype.kind == "f":
+        return samples.astype(np.float64)
+    info = np.iinfo(samples.dtype)
+    middle = (int(info.max) + int(info.min) + 1) / 2  # 0 for signed, 128 for uint8...
+    return (samples.astype(np.float64) - middle) / (info.max - middle + 1)
+
+
+def _from_float(samples, sample_type):
+    # floats in [-1, 1) to a numpy sample type
+    if np.dtype(sample_type).kind == "f":
+        return samples.astype(sample_type)
+    info = np.iinfo(sample_type)
+    middle = (int(info.max) + int(info.min) + 1) / 2
+    scaled = np.round(samples * (info.max - middle + 1) + middle)
+    return np.clip(scaled, info.min, info.max).astype(sample_type)
+
+
+def read_wav(path):
+    """returns (samples [frame, channel] as floats, frequency) of a wav file"""
+    with wave.open(path, "rb") as wav:
+        sample_type = _WAV_SAMPLE_TYPES[wav.getsampwidth()]
+        channels = wav.getnchannels()
+        frequency = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+    samples = np.frombuffer(data, dtype=np.dtype(sample_type).newbyteorder("<")).reshape(-1, channels)
+    return _to_float(samples), frequency
+
+
+def convert_samples(samples, frequency, mixer_frequency, sample_type, mixer_channels):
+    """converts float samples [frame, channel] to the mixer's rate, channel count and sample type"""
+    if frequency != mixer_frequency:
+        # linear interpolation onto the mixer's sample times
+        frame_count = round(len(samples) * mixer_frequency / frequency)
+        source_times = np.arange(len(samples)) / frequency
+        times = np.arange(frame_count) / mixer_frequency
+        samples = np.stack([np.interp(times, source_times, samples[:, channel]) for channel in range(samples.shape[1])], axis=1)
+    if samples.shape[1] != mixer_channels:
+        # down-mix to mono, then spread over the mixer's channels
+        samples = np.repeat(samples.mean(axis=1, keepdims=True), mixer_channels, axis=1)
+    return _from_float(samples, sample_type)
+
+
+def get_cache_path(path, mixer_config=None):
+    """returns where the conversion of a sound file for a mixer format is cached"""
+    frequency, size, channels = mixer_config or pygame.mixer.get_init()
+    name = path.replace("\\", "/").replace("/", "__")
+    return os.path.join(SOUND_CACHE_DIR, f"{frequency}_{size}_{channels}", name + ".pcm")
+
+
+def load_converted_sound(path):
+    """returns the sound at path in the mixer's format, converting it on the first load only"""
+    mixer_config = pygame.mixer.get_init()
+    frequency, size, channels = mixer_config
+    if size not in _SAMPLE_TYPES:
+        # a sample format this module does not convert to: SDL converts the file as it loads it
+        return pygame.mixer.Sound(path)
+    cache_path = get_cache_path(path, mixer_config)
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, "rb") as cache_file:
+                return pygame.mixer.Sound(buffer=cache_file.read())
+    except OSError:
+        pass
+
+    samples, source_frequency = read_wav(path)
+    converted = convert_samples(samples, source_frequency, frequency, _SAMPLE_TYPES[size], channels)
+    # mono mixers take one dimensional arrays
+    sound = pygame.sndarray.make_sound(np.ascontiguousarray(converted[:, 0]) if channels == 1 else converted)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "wb") as cache_file:
+            cache_file.write(converted.tobytes())
+    except OSError:
+        pass  # read-only install, convert again next time
+    return sound
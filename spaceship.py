@@ -1,13 +1,15 @@
 # spaceship.py
-import pygame
+from asset_bundle import load_image
+from sprite_atlas import SpriteAtlas
 
 class Spaceship:
     def __init__(self, x, y):
-        # load animation images
-        self.images = [
-            pygame.image.load(f"assets/images/spaceship/spaceship_{i}.png")
+        # load animation images (converted once, the spaceship never turns around)
+        self.atlas = SpriteAtlas({"spaceship": [
+            load_image(f"assets/images/spaceship/spaceship_{i}.png")
             for i in range(6)
-        ]
+        ]}, mirrored=False)
+        self.images = self.atlas.get_frames("spaceship")
         self.x = x
         self.y = y
         self.frame = 0
@@ -92,23 +94,18 @@ class Spaceship:
         self.frame = 0
         self.counter = 0
 
-    # draws the spaceship with clipping - only the visible part is displayed
-    def draw(self, screen):
+    def get_blit(self):
+        """returns the (surface, dest, area) blit that draws the visible part of the spaceship, or None"""
         if self.is_visible():
             visible_zone_top = 71 # visible zone starts at y = 71 (top of the playable screen)
             
             # if the spaceship is completely above the visible zone
             if self.y + 100 <= visible_zone_top:  # bottom of spaceship above 71px
-                return
+                return None
             
-            # if the spaceship is partially or completely visible
+            # if the spaceship is partially visible, cut the top part
             if self.y < visible_zone_top:
                 cut_top = visible_zone_top - self.y  # how many pixels to cut from the top
-                visible_height = 100 - cut_top  # visible height of the spaceship
-                
-                # create a subsurface (visible part only)
-                visible_part = self.image.subsurface(0, cut_top, 96, visible_height)
-                screen.blit(visible_part, (self.x, visible_zone_top))
-            else:
-                # spaceship completely visible
-                screen.blit(self.image, (self.x, self.y))
\ No newline at end of file
+                return self.image, (self.x, visible_zone_top), (0, cut_top, 96, 100 - cut_top)
+            return self.image, (self.x, self.y), None
+        return None
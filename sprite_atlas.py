@@ -0,0 +1,57 @@
+# sprite_atlas.py
+import pygame
+
+# facings, the source images look left
+FACING_LEFT = 0
+FACING_RIGHT = 1
+
+
+class SpriteAtlas:
+    """every frame of a sprite's animations, in both facings, prepared once at load time.
+
+    frames are converted to the display format when a display is open, and mirrored
+    copies and collision masks are made up front, so drawing never has to flip or
+    convert a surface and collision tests never build a mask.
+    """
+
+    def __init__(self, animations, mirrored=True):
+        # animations: name -> list of frames (source images, facing left)
+        self.frames = {}
+        for name, images in animations.items():
+            left = [self._prepare(image) for image in images]
+            right = [pygame.transform.flip(image, True, False) for image in left] if mirrored else left
+            self.frames[name] = (left, right)
+
+        # every distinct surface of the atlas, numbered (to save which frame a sprite shows)
+        self.surfaces = []
+        self.surface_indices = {}
+        for left, right in self.frames.values():
+            for surface in left + right:
+                if id(surface) not in self.surface_indices:
+                    self.surface_indices[id(surface)] = len(self.surfaces)
+                    self.surfaces.append(surface)
+        # collision mask of each surface (opaque pixels), in the same order
+        self.masks = [pygame.mask.from_surface(surface) for surface in self.surfaces]
+
+    @staticmethod
+    def _prepare(image):
+        # match the display pixel format when there is one (headless runs keep the source)
+        if pygame.display.get_surface() is not None:
+            return image.convert_alpha()
+        return image
+
+    def get(self, animation, frame=0, facing=FACING_LEFT):
+        """returns the surface for a frame of an animation in a facing"""
+        return self.frames[animation][facing][frame]
+
+    def get_frames(self, animation, facing=FACING_LEFT):
+        """returns every frame of an animation in a facing"""
+        return self.frames[animation][facing]
+
+    def index_of(self, surface):
+        """returns the number of a surface of the atlas"""
+        return self.surface_indices[id(surface)]
+
+    def get_mask(self, surface):
+        """returns the collision mask of a surface of the atlas"""
+        return self.masks[self.surface_indices[id(surface)]]
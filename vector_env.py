@@ -0,0 +1,130 @@
+# vector_env.py
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from graphics import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# frames are stored as rows of RGB pixels, like pygame.image.tobytes(surface, "RGB")
+FRAME_SHAPE = (SCREEN_HEIGHT, SCREEN_WIDTH, 3)
+FRAME_SIZE = SCREEN_HEIGHT * SCREEN_WIDTH * 3
+
+
+def _worker(index, conn, shm_name, skip_intro, auto_reset):
+    # one game per process, drawing straight into its slot of the shared frame block
+    import pygame
+    from simulation import Simulation
+    from batch_simulation import EVENT_FLAGS
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame_buffer = shm.buf[index * FRAME_SIZE:(index + 1) * FRAME_SIZE]
+    screen = pygame.image.frombuffer(frame_buffer, (SCREEN_WIDTH, SCREEN_HEIGHT), "RGB")
+    simulation = Simulation(screen)
+
+    def reset():
+        simulation.reset(skip_intro=skip_intro)
+        simulation.render()
+
+    try:
+        while True:
+            command, input_bits = conn.recv()
+            if command == "step":
+                events = 0
+                for event in simulation.step(input_bits):
+                    events |= EVENT_FLAGS.get(event, 0)
+                game_over = simulation.game_state_manager.is_game_over()
+                # report the state that ended the game, then start over
+                counter = simulation.counter.value
+                level = simulation.level_manager.get_current_level()
+                if game_over and auto_reset:
+                    reset()
+                else:
+                    simulation.render()
+                conn.send((events, counter, level, game_over))
+            elif command == "reset":
+                reset()
+                conn.send((0, simulation.counter.value, simulation.level_manager.get_current_level(), False))
+            elif command == "close":
+                break
+    finally:
+        # the surface must let go of the shared buffer before it can be closed
+        del screen
+        frame_buffer.release()
+        shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    """runs K games in worker processes that render into one shared memory block.
+
+    step() sends one input bitmask per game (see controls.py) and returns the event
+    flags (see batch_simulation.py), counter values, current levels and game over flags.
+    the frames are read from self.frames, a (K, height, width, 3) uint8 array backed by
+    the shared block: nothing is pickled or copied on the way to the driver.
+    """
+
+    def __init__(self, num_envs, skip_intro=True, auto_reset=True):
+        self.num_envs = num_envs
+        self._shm = shared_memory.SharedMemory(create=True, size=num_envs * FRAME_SIZE)
+        self.frames = np.ndarray((num_envs,) + FRAME_SHAPE, dtype=np.uint8, buffer=self._shm.buf)
+
+        # spawn: workers start from a clean pygame state
+        context = multiprocessing.get_context("spawn")
+        self._conns = []
+        self._processes = []
+        for index in range(num_envs):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker,
+                                      args=(index, child_conn, self._shm.name, skip_intro, auto_reset),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        self.closed = False
+
+    def reset(self):
+        """starts a new game in every worker, returns the counter values and levels"""
+        for conn in self._conns:
+            conn.send(("reset", 0))
+        _, counters, levels, _ = self._receive()
+        return counters, levels
+
+    def step(self, input_bits):
+        """advances every game by one frame with its input bitmask.
+
+        returns (events, counters, levels, game_over); with auto_reset, a game that
+        ended is restarted and its frame already shows the new game.
+        """
+        for conn, bits in zip(self._conns, input_bits):
+            conn.send(("step", int(bits)))
+        return self._receive()
+
+    def _receive(self):
+        # wait for every worker, they step in parallel
+        results = [conn.recv() for conn in self._conns]
+        events = np.array([result[0] for result in results], dtype=np.uint8)
+        counters = np.array([result[1] for result in results], dtype=np.int32)
+        levels = [result[2] for result in results]
+        game_over = np.array([result[3] for result in results], dtype=bool)
+        return events, counters, levels, game_over
+
+    def close(self):
+        """stops the workers and frees the shared memory"""
+        if self.closed:
+            return
+        for conn in self._conns:
+            conn.send(("close", 0))
+        for process in self._processes:
+            process.join()
+        for conn in self._conns:
+            conn.close()
+        del self.frames
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()